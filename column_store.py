@@ -0,0 +1,516 @@
+"""
+Column Storage for the Medical Triage Interpreter
+
+This module holds the patient data the Executor runs rules against.
+Each column is kept as one array of equal length, and all array work
+(comparisons, NULL checks, SET writes, counting) goes through the store
+so the Executor does not depend on where the arrays live.
+
+Two backends are provided:
+- ColumnStore: NumPy arrays in host memory (the default).
+- CudfColumnStore: cuDF columns in GPU memory, used for large datasets
+  when cudf and cupy are installed.
+"""
+
+import operator
+import numpy as np
+import pandas as pd
+from error_handler import ExecutorError
+
+# The GPU backend is optional; the NumPy backend works without it
+try:
+    import cudf
+    import cupy
+except ImportError:
+    cudf = None
+    cupy = None
+
+
+# Most row-sized bool buffers a store keeps for reuse
+MASK_POOL_SIZE = 8
+
+# Range of the int64 columns SET creates for integer values
+INT64_MIN = np.iinfo(np.int64).min
+INT64_MAX = np.iinfo(np.int64).max
+
+# Column name -> slot index, shared by every store so that compiled
+# conditions can refer to a column by position whatever dataset they run on
+COLUMN_IDS = {}
+
+def column_id(name):
+    """Returns the slot index of a column name, assigning the next one if new."""
+    return COLUMN_IDS.setdefault(name, len(COLUMN_IDS))
+
+def is_number(value):
+    """True for int/float values, excluding booleans."""
+    return isinstance(value, (int, float, np.integer, np.floating)) and not isinstance(value, (bool, np.bool_))
+
+def column_can_hold(values, value):
+    """
+    Checks whether 'value' can be written into the 'values' array without
+    coercion. Integers must also fit the range of an integer column
+    (e.g., 40000 does not fit an int16 'Heart Rate').
+    """
+    kind = values.dtype.kind
+    if kind == 'O':
+        return True
+    if isinstance(value, (bool, np.bool_)):
+        return kind == 'b'
+    if isinstance(value, (int, np.integer)):
+        if kind in 'iu':
+            limits = np.iinfo(values.dtype)
+            return limits.min <= value <= limits.max
+        return kind == 'f'
+    if isinstance(value, (float, np.floating)):
+        return kind == 'f'
+    return False
+
+def value_kind(value_type):
+    """Classifies a Python/NumPy type as 'boolean', 'number' or 'string'."""
+    if issubclass(value_type, (bool, np.bool_)):
+        return 'boolean'
+    if issubclass(value_type, (int, float, np.integer, np.floating)):
+        return 'number'
+    if issubclass(value_type, str):
+        return 'string'
+    return value_type.__name__
+
+def kinds_can_compare(left_kinds, right_kinds):
+    """
+    Checks whether values of the given kinds support ordering comparisons
+    (<, >, <=, >=). Strings only order against strings; numbers and
+    booleans order against each other.
+    """
+    if 'string' in left_kinds:
+        return not (right_kinds - {'string'})
+    if 'string' in right_kinds:
+        return not (left_kinds - {'string'})
+    return True
+
+def literal_for(values, value):
+    """
+    Rounds a numeric literal to the precision of the column it is compared
+    against. NumPy compares a float32 column with a Python float in
+    float32, so other evaluators must see the same rounded literal
+    (e.g., 38.1 in a float32 'Body Temperature' column).
+    """
+    if getattr(values, 'dtype', None) == np.float32:
+        return np.float32(value)
+    return value
+
+def compare_values(op_func, left_values, right_values, left_name, out=None):
+    """
+    Compares a column against a literal or another column, returning a
+    boolean mask. Any comparison involving a NULL value is False.
+    The mask is written into 'out' when it is given.
+    """
+    # Numeric columns: NaN already compares False under <, >, <=, >= and ==,
+    # so only != needs an explicit guard against NULLs
+    if left_values.dtype.kind in 'iuf' and (
+            is_number(right_values) or (isinstance(right_values, np.ndarray) and right_values.dtype.kind in 'iuf')):
+        with np.errstate(invalid='ignore'):
+            result = op_func(left_values, right_values, out=out)
+            if op_func is np.not_equal:
+                if left_values.dtype.kind == 'f':
+                    result &= left_values == left_values
+                if np.asarray(right_values).dtype.kind == 'f':
+                    result &= right_values == right_values
+        return result
+    
+    # Handle NULLs: any comparison with a NULL value is False
+    valid = ~(pd.isna(left_values) | pd.isna(right_values))
+
+    try:
+        with np.errstate(invalid='ignore'):
+            result = op_func(left_values, right_values)
+        return np.logical_and(np.asarray(result, dtype=bool), valid, out=out)
+    except TypeError:
+        pass
+
+    # Mixed types: compare element by element on the non-NULL rows only
+    result = np.empty(len(left_values), dtype=bool) if out is None else out
+    result.fill(False)
+    left_valid = left_values[valid].astype(object)
+    right_valid = right_values[valid].astype(object) if isinstance(right_values, np.ndarray) else right_values
+    try:
+        result[valid] = op_func(left_valid, right_valid)
+    except TypeError as e:
+        # Catch type errors (e.g., 'Age' > "High")
+        raise ExecutorError(f"Type mismatch during comparison on '{left_name}'. Error: {e}")
+    return result
+
+
+class ColumnStore(dict):
+    """
+    Maps column names to NumPy arrays of equal length. Reading a column
+    that does not exist creates it filled with NULLs, which allows rules
+    to SET a new variable and read it later
+    (e.g., SET Fever = True ... IF Fever == True THEN ...).
+    
+    Every column is also reachable by position through 'slots', indexed
+    by column_id(name), so compiled conditions skip the string hashing.
+    """
+    xp = np             # Array module the columns belong to
+    df_module = pd      # DataFrame module used to load and return data
+
+    def __init__(self, nrows, columns=()):
+        super().__init__(columns)
+        self.nrows = nrows
+        self.mask_pool = []   # Free row-sized bool buffers, see take_mask()
+        self.mask_memo = {}   # Structural key -> (shared mask, columns it reads)
+        self.slots = [None] * len(COLUMN_IDS)
+        for name, values in self.items():
+            self.set_slot(name, values)
+        self.kinds = {}     # Column name -> kinds of its non-NULL values
+        self.null_masks = {}  # Column name -> read-only mask of its NULL rows
+        self.integer_columns = set()  # Columns SET has only filled with integers
+        self.warned = set()  # Keys of the runtime warnings already printed
+
+    def __missing__(self, name):
+        values = self[name] = self.empty_column()
+        return values
+
+    def __setitem__(self, name, values):
+        super().__setitem__(name, values)
+        self.set_slot(name, values)
+
+    def create_missing(self, names):
+        """Creates every column in 'names' that does not exist yet, filled with NULLs."""
+        for name in names:
+            if name not in self:
+                self[name] = self.empty_column()
+
+    def set_slot(self, name, values):
+        """Stores 'values' at the slot index of column 'name'."""
+        index = column_id(name)
+        if index >= len(self.slots):
+            self.slots.extend([None] * (index + 1 - len(self.slots)))
+        self.slots[index] = values
+
+    def bind(self, names):
+        """
+        Makes sure 'slots' has an entry for every column in 'names'. The
+        entry of a column that does not exist yet stays None until a rule
+        reads or sets it.
+        """
+        size = max(map(column_id, names), default=-1) + 1
+        if size > len(self.slots):
+            self.slots.extend([None] * (size - len(self.slots)))
+
+    @classmethod
+    def from_frame(cls, frame):
+        """Builds a store holding a private copy of every column of 'frame'."""
+        return cls(len(frame), ((col, frame[col].to_numpy(copy=True)) for col in frame.columns))
+
+    def copy(self):
+        """Returns a store with copies of all columns."""
+        store = type(self)(self.nrows, ((col, values.copy()) for col, values in self.items()))
+        store.kinds = dict(self.kinds)
+        store.null_masks = dict(self.null_masks)
+        store.integer_columns = set(self.integer_columns)
+        return store
+
+    def empty_column(self):
+        """Returns a new column filled with NULLs."""
+        return np.full(self.nrows, np.nan)
+
+    def all_rows(self):
+        """Returns a read-only mask selecting every row."""
+        mask = np.ones(self.nrows, dtype=bool)
+        mask.flags.writeable = False
+        return mask
+
+    def no_rows(self):
+        """Returns a writable mask selecting no rows."""
+        mask = self.take_mask()
+        mask.fill(False)
+        return mask
+
+    def warn_once(self, key, message):
+        """Prints a runtime warning the first time 'key' reports one."""
+        if key not in self.warned:
+            self.warned.add(key)
+            print(f"Runtime Warning: {message}")
+
+    def take_mask(self):
+        """Returns a row-sized bool buffer from the pool (or a new one)."""
+        return self.mask_pool.pop() if self.mask_pool else np.empty(self.nrows, dtype=bool)
+
+    def release_mask(self, mask):
+        """
+        Returns a mask to the pool once nothing reads it any more. Only
+        writable buffers that own their memory are kept; read-only masks
+        (cached NULL masks, all_rows) are shared and never reused.
+        """
+        if (mask.flags.writeable and mask.base is None and mask.dtype == np.bool_
+                and len(mask) == self.nrows and len(self.mask_pool) < MASK_POOL_SIZE):
+            self.mask_pool.append(mask)
+
+    def remember_mask(self, key, mask, reads):
+        """
+        Keeps the mask of a shared condition subtree under its structural
+        key until one of the columns in 'reads' is written. The mask
+        becomes read-only, since every rule using the subtree now shares it.
+        """
+        mask.flags.writeable = False
+        self.mask_memo[key] = (mask, reads)
+        return mask
+
+    def forget_column(self, name):
+        """Drops the cached facts about a column after it has been written."""
+        self.kinds.pop(name, None)
+        self.null_masks.pop(name, None)
+        stale_keys = [key for key, (mask, reads) in self.mask_memo.items() if name in reads]
+        for key in stale_keys:
+            del self.mask_memo[key]
+
+    def and_masks(self, left, right):
+        """ANDs two masks, writing into 'left' when it is not shared."""
+        out = left if left.flags.writeable else self.take_mask()
+        np.logical_and(left, right, out=out)
+        self.release_mask(right)
+        return out
+
+    def or_masks(self, left, right):
+        """ORs two masks, writing into 'left' when it is not shared."""
+        out = left if left.flags.writeable else self.take_mask()
+        np.logical_or(left, right, out=out)
+        self.release_mask(right)
+        return out
+
+    def not_mask(self, mask):
+        """Negates a mask, in place when it is not shared."""
+        return np.logical_not(mask, out=mask if mask.flags.writeable else self.take_mask())
+
+    def select(self, context, condition, negate=False):
+        """
+        Returns a new mask of the 'context' rows where 'condition' holds
+        (or does not hold, with 'negate'), leaving both inputs unchanged.
+        """
+        # For booleans, a & ~b is a > b, which avoids a temporary for ~b
+        return (np.greater if negate else np.logical_and)(context, condition, out=self.take_mask())
+
+    def compare(self, op_func, left_values, right_values, left_name):
+        """Compares two columns (or a column and a literal) into a mask."""
+        return compare_values(op_func, left_values, right_values, left_name, out=self.take_mask())
+
+    def is_null(self, name):
+        """
+        Returns the mask of NULL entries in column 'name'. The mask is
+        computed once per column (NaN != NaN for floats, pd.isna for
+        object columns) and reused until the column is written, so it
+        must not be modified.
+        """
+        mask = self.null_masks.get(name)
+        if mask is None:
+            values = self[name]
+            kind = values.dtype.kind
+            if kind == 'f':
+                mask = values != values
+            elif kind == 'O':
+                mask = pd.isna(values)
+            else:
+                # Integer, boolean and string arrays cannot hold NULLs
+                mask = np.zeros(self.nrows, dtype=bool)
+            mask.flags.writeable = False
+            self.null_masks[name] = mask
+        return mask
+
+    def count(self, mask):
+        """Returns the number of rows selected by a mask."""
+        return int(np.count_nonzero(mask))
+
+    def pack_mask(self, mask):
+        """Packs a boolean mask into bits (8 rows per byte) for storage."""
+        return np.packbits(mask, bitorder='little')
+
+    def unpack_mask(self, packed):
+        """Restores a mask packed by pack_mask()."""
+        return np.unpackbits(packed, count=self.nrows, bitorder='little').view(bool)
+
+    def value_kinds(self, name):
+        """
+        Returns the set of kinds ('number', 'string', 'boolean') among the
+        non-NULL values of a column. Typed arrays answer from their dtype;
+        object arrays are scanned once and cached until the column is written.
+        """
+        kinds = self.kinds.get(name)
+        if kinds is not None:
+            return kinds
+        
+        values = self.get(name)
+        kind = values.dtype.kind if values is not None else None
+        if values is None or (kind in 'fO' and self.is_null(name).all()):
+            kinds = frozenset()
+        elif kind == 'b':
+            kinds = frozenset(['boolean'])
+        elif kind in 'iuf':
+            kinds = frozenset(['number'])
+        elif kind in 'US':
+            kinds = frozenset(['string'])
+        else:
+            kinds = frozenset(map(value_kind, set(map(type, values[~self.is_null(name)]))))
+        self.kinds[name] = kinds
+        return kinds
+
+    def assign(self, name, mask, value):
+        """Writes 'value' into the rows of column 'name' selected by 'mask'."""
+        is_integer = (isinstance(value, (int, np.integer)) and not isinstance(value, (bool, np.bool_))
+                      and INT64_MIN <= value <= INT64_MAX)
+        values = self.get(name)
+        if is_integer and (values is None or values.dtype.kind not in 'iu') and mask.all():
+            # Every row gets the integer, so no row needs a NaN
+            values = np.empty(self.nrows, dtype=np.int64)
+            self.integer_columns.add(name)
+        elif values is None:
+            values = self.empty_column()
+            if is_integer:
+                self.integer_columns.add(name)
+        elif is_integer and values.dtype.kind in 'fO' and self.is_null(name).all():
+            # A column holding only NULLs so far (e.g., one a condition read
+            # before any SET) counts as new
+            self.integer_columns.add(name)
+
+        # Widen the column when it cannot hold the new value
+        # (e.g., a string into floats, 2.5 into integers, or 40000 into int16)
+        if not column_can_hold(values, value):
+            if isinstance(value, (int, np.integer)) and values.dtype.kind in 'iu':
+                # The narrowest integer type holding both; object past int64
+                dtype = np.result_type(values.dtype, np.min_scalar_type(value))
+                values = values.astype(dtype if dtype.kind in 'iu' else object)
+            elif is_number(value) and values.dtype.kind in 'iuf':
+                values = values.astype(np.float64)
+            elif name in self.integer_columns and values.dtype.kind == 'f':
+                # The integers written so far stay ints next to other kinds
+                valid = ~self.is_null(name)
+                objects = values.astype(object)
+                objects[valid] = values[valid].astype(np.int64).tolist()
+                values = objects
+            else:
+                values = values.astype(object)
+        if not is_integer:
+            self.integer_columns.discard(name)
+
+        # Modify the rows in-place
+        values[mask] = value
+        self[name] = values
+        self.forget_column(name)
+
+    def to_frame(self):
+        """
+        Materializes the columns as a pandas DataFrame. A column SET only
+        ever filled with integers, and that ended up set on every row, comes
+        back as int64 rather than the float64 its NaNs forced.
+        """
+        frame = pd.DataFrame(self).infer_objects()
+        for name in self.integer_columns:
+            values = self.get(name)
+            if values is not None and values.dtype.kind == 'f' and not self.is_null(name).any():
+                frame[name] = values.astype(np.int64)
+        return frame
+
+
+# Comparison ufuncs mapped to the operators cuDF columns implement natively
+_DEVICE_OPERATORS = {
+    np.greater: operator.gt,
+    np.less: operator.lt,
+    np.greater_equal: operator.ge,
+    np.less_equal: operator.le,
+    np.equal: operator.eq,
+    np.not_equal: operator.ne,
+}
+
+class CudfColumnStore(ColumnStore):
+    """
+    Keeps every column as a cuDF Series in GPU memory. Masks are boolean
+    Series on the device, and data only returns to the host when the
+    final DataFrame is built. cuDF columns have a single dtype, so a
+    column cannot mix value types (e.g., strings and booleans).
+    """
+    xp = cupy
+    df_module = cudf
+
+    @classmethod
+    def from_frame(cls, frame):
+        frame = frame.reset_index(drop=True)
+        return cls(len(frame), ((col, frame[col].copy()) for col in frame.columns))
+
+    def empty_column(self):
+        return cudf.Series(cupy.full(self.nrows, np.nan))
+
+    def all_rows(self):
+        return cudf.Series(cupy.ones(self.nrows, dtype=bool))
+
+    def no_rows(self):
+        return cudf.Series(cupy.zeros(self.nrows, dtype=bool))
+
+    # cuDF manages device memory itself, so masks are not pooled
+    def release_mask(self, mask):
+        pass
+
+    def remember_mask(self, key, mask, reads):
+        # Device masks are never written in place, so they can be shared as is
+        self.mask_memo[key] = (mask, reads)
+        return mask
+
+    def and_masks(self, left, right):
+        return left & right
+
+    def or_masks(self, left, right):
+        return left | right
+
+    def not_mask(self, mask):
+        return ~mask
+
+    def select(self, context, condition, negate=False):
+        return context & ~condition if negate else context & condition
+
+    def compare(self, op_func, left_values, right_values, left_name):
+        try:
+            result = _DEVICE_OPERATORS[op_func](left_values, right_values)
+        except TypeError as e:
+            raise ExecutorError(f"Type mismatch during comparison on '{left_name}'. Error: {e}")
+        # NULLs compare as NULL on the device; treat them as False
+        return result.fillna(False)
+
+    def is_null(self, name):
+        return self[name].isna()
+
+    def count(self, mask):
+        return int(mask.sum())
+
+    # Device masks stay unpacked; GPU memory bandwidth is not the bottleneck
+    def pack_mask(self, mask):
+        return mask
+
+    def unpack_mask(self, packed):
+        return packed
+
+    def value_kinds(self, name):
+        # cuDF columns hold a single type; strings have the object dtype
+        values = self.get(name)
+        if values is None or values.isna().all():
+            return frozenset()
+        kind = values.dtype.kind
+        return frozenset(['string' if kind == 'O' else 'boolean' if kind == 'b' else 'number'])
+
+    def assign(self, name, mask, value):
+        values = self.get(name)
+        if values is None or values.isna().all():
+            # A column with no values yet takes the dtype of its first value
+            values = cudf.Series([None] * self.nrows, dtype=cudf.Series([value]).dtype)
+        try:
+            self[name] = values.where(~mask, value)
+        except (TypeError, ValueError) as e:
+            raise ExecutorError(f"Cannot store {value!r} in column '{name}' on the cuDF backend. Error: {e}")
+        self.forget_column(name)
+
+    def to_frame(self):
+        return cudf.DataFrame(dict(self)).to_pandas()
+
+
+# Backend name -> column store class, selected with Executor(ast, backend=...)
+COLUMN_STORES = {
+    'numpy': ColumnStore,
+    'cudf': CudfColumnStore,
+}
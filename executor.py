@@ -4,41 +4,445 @@ Executor (Interpreter Engine) for the Medical Triage Interpreter
 This module takes the Abstract Syntax Tree (AST) from the Parser
 and executes the logic against a patient dataset.
 
-It uses the Visitor design pattern to traverse the AST.
+It uses the Visitor design pattern to traverse rules and actions, and
+compiles rule conditions once into closures over the column arrays.
 
 Supports COUNT() and ELSE blocks in rules.
 Generates hospital-level status separately from patient rows.
 """
 
-import pandas as pd
+import ast
+import hashlib
+from collections import OrderedDict
 import numpy as np
 from error_handler import ExecutorError
+from column_store import COLUMN_STORES, column_id, is_number, literal_for, value_kind, kinds_can_compare
+from jit_kernels import compile_tape_condition, compile_rule_kernel, compile_count_kernel
+
+# numexpr is optional; without it conditions use the NumPy closures only
+try:
+    import numexpr
+except ImportError:
+    numexpr = None
+
+# pyarrow is optional; without it CSV files are read with pandas
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+except ImportError:
+    pa = None
+    pacsv = None
 from triage_parser import (
-    ASTNode, RuleScriptNode, RuleNode, SetActionNode, BinaryOpNode,
+    parse_tokens, ASTNode, RuleScriptNode, RuleNode, SetActionNode, BinaryOpNode,
     UnaryOpNode, ComparisonNode, IsNullNode, ValueNode, IdentifierNode,
-    CountNode
+    CountNode, NODE_KINDS, KIND_BINARY_OP, KIND_UNARY_OP, KIND_COMPARISON,
+    KIND_IS_NULL, KIND_COUNT, KIND_VALUE, KIND_IDENTIFIER
 )
-from lexer import TokenType
+from lexer import Lexer, TokenType
+
+# NumPy ufuncs implementing each comparison operator over whole columns
+COMPARISON_UFUNCS = {
+    TokenType.GT: np.greater,
+    TokenType.LT: np.less,
+    TokenType.GTE: np.greater_equal,
+    TokenType.LTE: np.less_equal,
+    TokenType.EQ: np.equal,
+    TokenType.NEQ: np.not_equal,
+}
+
+# Narrow storage types for the vital-sign columns and the derived features
+# shipped with the dataset, used when narrowing is requested. Integer
+# vitals fit in int16; continuous measurements need far less precision
+# than float64.
+VITAL_SIGN_DTYPES = {
+    'Heart Rate': np.int16,
+    'Respiratory Rate': np.int16,
+    'Systolic Blood Pressure': np.int16,
+    'Diastolic Blood Pressure': np.int16,
+    'Age': np.int16,
+    'Body Temperature': np.float32,
+    'Oxygen Saturation': np.float32,
+    'Weight (kg)': np.float32,
+    'Height (m)': np.float32,
+    'Derived_HRV': np.float32,
+    'Derived_Pulse_Pressure': np.int16,
+    'Derived_BMI': np.float32,
+    'Derived_MAP': np.float32,
+}
+INT16_MIN = np.iinfo(np.int16).min
+INT16_MAX = np.iinfo(np.int16).max
+
+# Operators that order values, and so cannot compare strings with numbers
+ORDERING_OPERATORS = frozenset((TokenType.GT, TokenType.LT, TokenType.GTE, TokenType.LTE))
+# Below this many rows the fused numexpr and tape kernels cost more than
+# the plain compiled closures (thread start-up and Numba kernel loading)
+FUSED_MIN_ROWS = 1_000_000
+
+# Operators that only test equality, and never fail on mixed kinds
+EQUALITY_OPERATORS = frozenset((TokenType.EQ, TokenType.NEQ))
+
+# Comparison operators as written in numexpr expressions
+NUMEXPR_OPERATORS = {
+    TokenType.GT: '>',
+    TokenType.LT: '<',
+    TokenType.GTE: '>=',
+    TokenType.LTE: '<=',
+    TokenType.EQ: '==',
+    TokenType.NEQ: '!=',
+}
+
+def structural_key(node):
+    """
+    Builds a hashable key describing the structure of an AST subtree.
+    Structurally identical subtrees (e.g., the same COUNT condition written
+    in two rules) produce equal keys.
+    """
+    kind = node.kind
+    if kind == KIND_BINARY_OP:
+        return ('BinaryOp', node.op_token.type, structural_key(node.left), structural_key(node.right))
+    if kind == KIND_UNARY_OP:
+        return ('UnaryOp', node.op_token.type, structural_key(node.operand))
+    if kind == KIND_COMPARISON:
+        return ('Comparison', node.op_token.type, structural_key(node.left_identifier), structural_key(node.right_value))
+    if kind == KIND_IS_NULL:
+        return ('IsNull', node.is_not, structural_key(node.identifier))
+    if kind == KIND_COUNT:
+        return ('Count', structural_key(node.condition))
+    if kind == KIND_IDENTIFIER:
+        return ('Identifier', node.name)
+    if kind == KIND_VALUE:
+        return ('Value', node.token.type, node.value)
+    raise ExecutorError(f"Cannot build a key for AST node type: {type(node).__name__}")
+
+def referenced_columns(node):
+    """Returns the set of column names read by an AST subtree."""
+    kind = node.kind
+    if kind == KIND_IDENTIFIER:
+        return {node.name}
+    if kind == KIND_BINARY_OP:
+        return referenced_columns(node.left) | referenced_columns(node.right)
+    if kind == KIND_UNARY_OP:
+        return referenced_columns(node.operand)
+    if kind == KIND_COMPARISON:
+        return referenced_columns(node.left_identifier) | referenced_columns(node.right_value)
+    if kind == KIND_IS_NULL:
+        return referenced_columns(node.identifier)
+    if kind == KIND_COUNT:
+        return referenced_columns(node.condition)
+    return set()
+
+def condition_columns(node, names=None):
+    """
+    Returns the column names read by a condition as a tuple, in the order
+    they are written.
+    """
+    if names is None:
+        names = {}
+    kind = node.kind
+    if kind == KIND_IDENTIFIER:
+        names[node.name] = None
+    elif kind == KIND_BINARY_OP:
+        condition_columns(node.left, names)
+        condition_columns(node.right, names)
+    elif kind == KIND_UNARY_OP:
+        condition_columns(node.operand, names)
+    elif kind == KIND_COMPARISON:
+        condition_columns(node.left_identifier, names)
+        condition_columns(node.right_value, names)
+    elif kind == KIND_IS_NULL:
+        condition_columns(node.identifier, names)
+    return tuple(names)
+
+def predicate_cost(node):
+    """
+    Static cost estimate of evaluating a condition: NULL and equality
+    checks are cheapest, range comparisons next, then comparisons against
+    strings (element-wise over object arrays) and other columns, and
+    COUNT sub-queries the most expensive.
+    """
+    kind = node.kind
+    if kind == KIND_IS_NULL:
+        return 1
+    if kind == KIND_COMPARISON:
+        cost = 1 if node.op_token.type in EQUALITY_OPERATORS else 2
+        if node.right_value.kind == KIND_IDENTIFIER:
+            cost += 1
+        elif node.right_value.token.type == TokenType.STRING:
+            cost += 2
+        return cost
+    if kind == KIND_UNARY_OP:
+        return predicate_cost(node.operand)
+    if kind == KIND_BINARY_OP:
+        return predicate_cost(node.left) + predicate_cost(node.right)
+    if kind == KIND_COUNT:
+        return 100
+    return 1
+
+def reorder_operands(node):
+    """
+    Returns 'node' with every AND chain and every OR chain reordered so
+    the cheapest predicates run first. Conditions have no side effects,
+    so the order of the operands does not change the result, but an early
+    all-False mask lets an AND (or an all-True mask lets an OR)
+    short-circuit past the expensive operands.
+    """
+    if isinstance(node, UnaryOpNode):
+        node.operand = reorder_operands(node.operand)
+        return node
+    if not isinstance(node, BinaryOpNode):
+        return node
+    
+    # Flatten the chain 'a AND b AND c' (or 'a OR b OR c') into its operands
+    op_type = node.op_token.type
+    operands = []
+    pending = [node]
+    while pending:
+        current = pending.pop()
+        if isinstance(current, BinaryOpNode) and current.op_token.type == op_type:
+            pending.append(current.right)
+            pending.append(current.left)
+        else:
+            operands.append(reorder_operands(current))
+    
+    # Stable sort keeps the written order among equally cheap operands
+    operands.sort(key=predicate_cost)
+    result = operands[0]
+    for operand in operands[1:]:
+        result = BinaryOpNode(left=result, op_token=node.op_token, right=operand)
+    return result
+
+def plan_conditions(actions):
+    """
+    Reorders the conditions of a list of rules/actions in place, once.
+    Nodes that were already planned (e.g., an AST shared by two
+    Executors) are skipped. The columns each condition reads are recorded
+    first, since a short-circuit can skip a reordered operand whose
+    column the written order would have created.
+    """
+    for node in actions or ():
+        if isinstance(node, RuleNode):
+            if not getattr(node, '_planned', False):
+                node._columns = condition_columns(node.condition)
+                node.condition = reorder_operands(node.condition)
+                node._planned = True
+            plan_conditions(node.then_actions)
+            plan_conditions(node.else_actions)
+        elif isinstance(node, SetActionNode) and isinstance(node.value_node, CountNode):
+            count_node = node.value_node
+            if not getattr(count_node, '_planned', False):
+                count_node._columns = condition_columns(count_node.condition)
+                count_node.condition = reorder_operands(count_node.condition)
+                count_node._planned = True
+
+def iter_conditions(actions):
+    """Yields the condition of every rule, nested rule and COUNT in a list of actions."""
+    for node in actions or ():
+        if isinstance(node, RuleNode):
+            yield node.condition
+            yield from iter_conditions(node.then_actions)
+            yield from iter_conditions(node.else_actions)
+        elif isinstance(node, SetActionNode) and isinstance(node.value_node, CountNode):
+            yield node.value_node.condition
+
+def mark_shared_conditions(rules):
+    """
+    Finds condition subtrees that occur more than once in the script
+    (e.g., 'Heart Rate' > 100 tested by several rules) and stores their
+    structural key on every occurrence as '_hash'. The compiled closures
+    of those subtrees share one mask per execution (see ColumnStore.mask_memo).
+    Subtrees that occur once get '_hash' = None.
+    """
+    occurrences = {}
+    
+    def walk(node):
+        if isinstance(node, BinaryOpNode):
+            key = ('BinaryOp', node.op_token.type, walk(node.left), walk(node.right))
+        elif isinstance(node, UnaryOpNode):
+            key = ('UnaryOp', node.op_token.type, walk(node.operand))
+        elif isinstance(node, (ComparisonNode, IsNullNode)):
+            key = structural_key(node)
+        else:
+            return structural_key(node)
+        occurrences.setdefault(key, []).append(node)
+        return key
+    
+    for condition in iter_conditions(rules):
+        walk(condition)
+    for key, nodes in occurrences.items():
+        shared_key = key if len(nodes) > 1 else None
+        for node in nodes:
+            node._hash = shared_key
+
+def written_columns(actions):
+    """Returns the set of column names SET by a list of actions, including nested rules."""
+    columns = set()
+    for action in actions or ():
+        if isinstance(action, SetActionNode):
+            columns.add(action.identifier.name)
+        elif isinstance(action, RuleNode):
+            columns |= written_columns(action.then_actions) | written_columns(action.else_actions)
+    return columns
+
+def action_reads(actions):
+    """Returns the set of column names read while running a list of actions."""
+    columns = set()
+    for action in actions or ():
+        if isinstance(action, SetActionNode):
+            columns |= referenced_columns(action.value_node)
+        elif isinstance(action, RuleNode):
+            columns |= referenced_columns(action.condition)
+            columns |= action_reads(action.then_actions) | action_reads(action.else_actions)
+    return columns
+
+def plan_waves(rules):
+    """
+    Groups top-level rules into waves. The conditions of all rules in a
+    wave can be evaluated together before any of their actions run, so
+    a rule starts a new wave only when its condition reads a column that
+    an earlier rule writes. Any other overlap between two rules keeps the
+    later rule in the same or a later wave, and actions always run in
+    script order within a wave.
+    """
+    infos = []
+    for rule in rules:
+        writes = written_columns(rule.then_actions) | written_columns(rule.else_actions)
+        condition_reads = referenced_columns(rule.condition)
+        reads = condition_reads | action_reads(rule.then_actions) | action_reads(rule.else_actions)
+        infos.append((condition_reads, reads, writes))
+    
+    wave_of = []
+    for j, (condition_reads, reads, writes) in enumerate(infos):
+        wave = 0
+        for i in range(j):
+            _, earlier_reads, earlier_writes = infos[i]
+            if earlier_writes & condition_reads:
+                wave = max(wave, wave_of[i] + 1)
+            elif earlier_writes & (reads | writes) or earlier_reads & writes:
+                wave = max(wave, wave_of[i])
+        wave_of.append(wave)
+    
+    waves = [[] for _ in range(max(wave_of, default=-1) + 1)]
+    for rule, wave in zip(rules, wave_of):
+        waves[wave].append(rule)
+    return waves
+
+def comparison_type_error(columns, comparison):
+    """
+    Checks the value kinds of the column and the literal (or column) of an
+    ordering comparison against the current columns. Returns a message if
+    the comparison cannot work (e.g., 'Age' > "High"), or None.
+    """
+    left_kinds = columns.value_kinds(comparison.left_identifier.name)
+    right = comparison.right_value
+    if isinstance(right, IdentifierNode):
+        right_kinds = columns.value_kinds(right.name)
+    elif right.value is None:
+        right_kinds = frozenset()
+    else:
+        right_kinds = frozenset([value_kind(type(right.value))])
+    if kinds_can_compare(left_kinds, right_kinds):
+        return None
+    return (f"Type mismatch during comparison on '{comparison.left_identifier.name}'. "
+            f"Error: '{comparison.op_token.value}' not supported between "
+            f"{'/'.join(sorted(left_kinds))} and {'/'.join(sorted(right_kinds))} values")
+
+def read_patient_csv(filepath, df_module, native=True, narrow=False):
+    """
+    Reads the patient CSV. With 'narrow', the vital-sign columns get
+    narrow dtypes, which halves (or quarters) the memory each rule has
+    to scan: continuous vitals are parsed directly as float32, and
+    integer vitals become int16 when they fit, or float32 when they have
+    missing values. Narrowing is opt-in because float32 rounds values
+    near decimal thresholds (e.g., 'Body Temperature' > 37.2) differently.
+    'native' marks a host (pandas) read: the file is memory-mapped rather
+    than copied into a read buffer, and pyarrow parses it when installed.
+    """
+    float_columns = {col: np.float32 for col, dtype in VITAL_SIGN_DTYPES.items() if dtype == np.float32} if narrow else {}
+    if pacsv is not None and native:
+        data = read_csv_arrow(filepath, float_columns)
+    elif native:
+        data = df_module.read_csv(filepath, dtype=float_columns, memory_map=True)
+    else:
+        data = df_module.read_csv(filepath, dtype=float_columns)
+    if not narrow:
+        return data
+    
+    for col, dtype in VITAL_SIGN_DTYPES.items():
+        if dtype != np.int16 or col not in data.columns:
+            continue
+        values = data[col]
+        if values.dtype.kind in 'iu' and (len(values) == 0 or (values.min() >= INT16_MIN and values.max() <= INT16_MAX)):
+            data[col] = values.astype(np.int16)
+        elif values.dtype.kind == 'f':
+            data[col] = values.astype(np.float32)
+    return data
+
+def read_csv_arrow(filepath, float_columns):
+    """
+    Reads a memory-mapped CSV with pyarrow's multi-threaded parser and
+    converts it to pandas one column block at a time. Timestamps are
+    kept as text and empty strings read as NULL, the same as pandas
+    reads them.
+    """
+    column_types = {col: pa.from_numpy_dtype(dtype) for col, dtype in float_columns.items()}
+    
+    # Peek at the inferred schema so timestamp columns can stay strings
+    with pa.memory_map(str(filepath)) as source, pacsv.open_csv(source) as reader:
+        for field in reader.schema:
+            if pa.types.is_timestamp(field.type) or pa.types.is_date(field.type) or pa.types.is_time(field.type):
+                column_types[field.name] = pa.string()
+    
+    with pa.memory_map(str(filepath)) as source:
+        table = pacsv.read_csv(source, convert_options=pacsv.ConvertOptions(column_types=column_types, strings_can_be_null=True))
+    return table.to_pandas(split_blocks=True, self_destruct=True)
+
 
 class Executor:
     """
     Executes the parsed rule script (AST) on a loaded DataFrame.
+    'backend' selects where the columns live: "numpy" (default) or "cudf"
+    to keep data and masks on the GPU. 'narrow' loads CSV vitals and
+    computes the engineered features with narrow dtypes (see
+    read_patient_csv), trading float64 precision for memory.
     """
-    def __init__(self, ast):
+    def __init__(self, ast, backend="numpy", narrow=False):
         if not isinstance(ast, RuleScriptNode):
             raise ExecutorError("Executor must be initialized with a valid RuleScriptNode.")
+        if backend not in COLUMN_STORES:
+            raise ExecutorError(f"Unknown backend '{backend}'. Expected one of: {', '.join(COLUMN_STORES)}.")
+        self._store_class = COLUMN_STORES[backend]
+        if self._store_class.df_module is None:
+            raise ExecutorError(f"The '{backend}' backend requires the cudf and cupy packages.")
+        self.backend = backend
+        self.narrow = narrow
+        self._xp = self._store_class.xp
+        self._df_module = self._store_class.df_module
         self.ast = ast
+        plan_conditions(ast.rules)  # Cheapest AND/OR operands first
+        mark_shared_conditions(ast.rules)  # Subexpressions whose masks are shared
+        self.bound_columns = self._bind(ast.rules)  # Column names read by any condition
+        self.waves = plan_waves(ast.rules)  # Rules grouped into independent batches
         self.data = None
-        self.all_rows = None  # For COUNT function access
-        self.count_cache = {}  # Cache COUNT results per rule iteration
+        self.columns = None  # ColumnStore: column name -> array (one contiguous array per column)
+        self.nrows = 0
+        self.count_cache = {}  # Structural condition key -> (count, columns the condition reads)
+        # RuleNode/CountNode -> per-rule Numba kernel from jit_compile(). Kept
+        # here rather than on the AST, which cached scripts share.
+        self.jit_conditions = {}
+        self.jit_counters = {}  # CountNode -> Numba counting kernel
 
     def load_data(self, filepath):
         """
-        Loads patient data from a CSV file and performs feature engineering
-        as defined in the Data_Preprocessing_&_Cleaning.ipynb notebook.
+        Loads patient data from a CSV file (or a Parquet file written by
+        prepare_data.py) and performs feature engineering as defined in
+        the Data_Preprocessing_&_Cleaning.ipynb notebook.
         """
         try:
-            self.data = pd.read_csv(filepath)
+            if str(filepath).endswith('.parquet'):
+                # Parquet keeps the column types it was written with; nothing to parse
+                self.data = self._df_module.read_parquet(filepath)
+            else:
+                self.data = read_patient_csv(filepath, self._df_module, native=self.backend == 'numpy', narrow=self.narrow)
             print(f"Successfully loaded '{filepath}'.")
         except FileNotFoundError:
             raise ExecutorError(f"Data file not found at path: {filepath}")
@@ -55,190 +459,623 @@ class Executor:
                 if col not in self.data.columns:
                     print(f"Warning: Missing data column for feature engineering: '{col}'. Rules using this column may fail.")
             
+            # Work on raw float arrays with NumPy (or CuPy) ufuncs writing into
+            # preallocated buffers, instead of allocating a Series per operator
+            xp = self._xp
+            columns = self.data.columns
+            
             # Handle division by zero for BMI by setting non-positive heights to NaN (vectorized)
-            if 'Height (m)' in self.data.columns:
-                self.data['Height (m)'] = self.data['Height (m)'].where(self.data['Height (m)'] > 0, np.nan)
+            if 'Height (m)' in columns:
+                height = self._float_column('Height (m)')
+                xp.copyto(height, xp.nan, where=~(height > 0))
+                self.data['Height (m)'] = height
             
             # Calculate engineered features
-            if 'Systolic Blood Pressure' in self.data.columns and 'Diastolic Blood Pressure' in self.data.columns:
-                self.data['Pulse_Pressure'] = self.data['Systolic Blood Pressure'] - self.data['Diastolic Blood Pressure']
-                self.data['MAP'] = self.data['Diastolic Blood Pressure'] + (self.data['Pulse_Pressure'] / 3)
+            if 'Systolic Blood Pressure' in columns and 'Diastolic Blood Pressure' in columns:
+                systolic = self._float_column('Systolic Blood Pressure')
+                diastolic = self._float_column('Diastolic Blood Pressure')
+                pulse_pressure = xp.empty_like(systolic)
+                mean_arterial = xp.empty_like(systolic)
+                xp.subtract(systolic, diastolic, out=pulse_pressure)
+                xp.divide(pulse_pressure, 3.0, out=mean_arterial)
+                xp.add(diastolic, mean_arterial, out=mean_arterial)
+                if not self.narrow and self.data['Systolic Blood Pressure'].dtype.kind in 'iu' and self.data['Diastolic Blood Pressure'].dtype.kind in 'iu':
+                    # Integer vitals give an integer pulse pressure, as pandas computes it
+                    pulse_pressure = pulse_pressure.astype(xp.int64)
+                self.data['Pulse_Pressure'] = pulse_pressure
+                self.data['MAP'] = mean_arterial
             
-            if 'Weight (kg)' in self.data.columns and 'Height (m)' in self.data.columns:
-                self.data['BMI'] = self.data['Weight (kg)'] / (self.data['Height (m)'] ** 2)
+            if 'Weight (kg)' in columns and 'Height (m)' in columns:
+                weight = self._float_column('Weight (kg)')
+                bmi = xp.empty_like(weight)
+                xp.square(height, out=bmi)
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    xp.divide(weight, bmi, out=bmi)
+                self.data['BMI'] = bmi
             
-            # Replace infinities from division by zero with NaN (which 'IS NULL' can catch)
-            self.data.replace([np.inf, -np.inf], np.nan, inplace=True)
+            # Replace infinities from division by zero with NaN (which 'IS NULL' can catch).
+            # Only float columns can hold them; a column is copied only if it has one.
+            for col in columns.union(['Pulse_Pressure', 'MAP', 'BMI'], sort=False):
+                if col in self.data.columns and self.data[col].dtype.kind == 'f':
+                    values = xp.asarray(self.data[col].values)
+                    infinite = xp.isinf(values)
+                    if infinite.any():
+                        values = values.copy()
+                        xp.copyto(values, xp.nan, where=infinite)
+                        self.data[col] = values
             print("Feature engineering complete.")
             
         except Exception as e:
             raise ExecutorError(f"Error during feature engineering: {e}")
+        
+        # Hold each column as its own contiguous array so rules scan
+        # packed values instead of per-patient records
+        self.columns = self._store_class.from_frame(self.data)
+        self.nrows = self.columns.nrows
+
+    def _float_column(self, name):
+        """
+        Returns a writable float copy of a loaded column as a raw array:
+        float32 when narrowing, otherwise float64.
+        """
+        dtype = self._xp.float32 if self.narrow else self._xp.float64
+        return self._xp.array(self.data[name].values, dtype=dtype)
 
     def execute(self):
         """
         Executes the full rule script on the loaded data.
-        It iterates through each rule, and for each rule, iterates
-        through each patient (row).
+        Each rule is evaluated once over whole column arrays: conditions
+        produce boolean masks, and SET actions write through those masks.
         """
         if self.data is None:
             raise ExecutorError("Data not loaded. Call load_data(filepath) first.")
             
-        # We create a dictionary from the dataframe for faster row-by-row processing
-        # and to allow setting new values.
-        results = self.data.to_dict('records')
-        self.all_rows = results  # Store for COUNT function
-        
-        for rule_node in self.ast.rules:
-            # Reset COUNT cache for each rule to ensure fresh evaluations
-            self.count_cache = {}
-            
-            for row in results:
-                # The 'row' is our context for this execution
-                try:
-                    self.visit(rule_node, row)
-                except Exception as e:
-                    # Catch runtime errors during rule evaluation (e.g., comparing string to number)
-                    # We will log this error and continue to the next row
-                    patient_id = row.get('Patient ID', 'Unknown')
-                    print(f"Runtime Warning: {e}. Skipping rule for row {patient_id}")
+        # Rules write into copies so the loaded columns stay intact between executions
+        loaded_columns = self.columns
+        self.columns = loaded_columns.copy()
+        self.columns.bind(self.bound_columns)
+        all_rows = self.columns.all_rows()
+        
+        # COUNT results are shared across rules; SET actions drop the
+        # entries whose condition reads the column they write
+        self.count_cache = {}
+        
+        try:
+            for wave in self.waves:
+                # Evaluate every condition of the wave back to back while the
+                # columns they share are hot, then apply the actions in order.
+                # Masks waiting for their actions are held bit-packed, so a
+                # wide wave keeps 1/8 of the bytes alive.
+                pack = len(wave) > 1
+                condition_masks = []
+                for rule_node in wave:
+                    self.columns.create_missing(rule_node._columns)
+                    condition_mask = self.compiled_condition(rule_node)(self.columns)
+                    condition_masks.append(self.columns.pack_mask(condition_mask) if pack else condition_mask)
+                
+                for rule_node, condition_mask in zip(wave, condition_masks):
+                    if pack:
+                        condition_mask = self.columns.unpack_mask(condition_mask)
+                    self.apply_rule(rule_node, all_rows, condition_mask)
+                    self.columns.release_mask(condition_mask)
 
-        # Convert the list of dictionaries back to a DataFrame
-        return pd.DataFrame(results)
+            # Only materialize a DataFrame once all rules have run
+            return self.columns.to_frame()
+        finally:
+            self.columns = loaded_columns
 
 
-    def visit(self, node, context_row):
+    def visit(self, node, context_mask):
         """
         Generic visit method that dispatches to the correct node-specific visitor.
-        'context_row' is the current patient data (a dictionary).
+        'context_mask' is a boolean array selecting the patient rows the node
+        applies to. Conditions are evaluated through compiled_condition().
         """
-        method_name = f'visit_{type(node).__name__}'
-        visitor = getattr(self, method_name, self.generic_visit)
-        return visitor(node, context_row)
+        return Executor._DISPATCH[node.kind](self, node, context_mask)
 
-    def generic_visit(self, node, context_row):
+    def generic_visit(self, node, context_mask):
         """Called if no explicit visitor method exists."""
         raise ExecutorError(f"No visitor method found for AST node type: {type(node).__name__}")
 
-    def visit_RuleNode(self, node, context_row):
+    def visit_RuleNode(self, node, context_mask):
         """Visits a rule node with condition, then_actions, and optional else_actions."""
-        condition_result = self.visit(node.condition, context_row)
-        
-        if condition_result:
-            # Execute THEN branch
-            for action_node in node.then_actions:
-                self.visit(action_node, context_row)
-        elif node.else_actions is not None:
-            # Execute ELSE branch if condition is false
-            for action_node in node.else_actions:
-                self.visit(action_node, context_row)
-        
+        self.columns.create_missing(node._columns)
+        condition_mask = self.compiled_condition(node)(self.columns)
+        self.apply_rule(node, context_mask, condition_mask)
+        self.columns.release_mask(condition_mask)
         return True
 
-    def visit_BinaryOpNode(self, node, context_row):
-        """Visits AND/OR nodes with short-circuit evaluation."""
-        # Short-circuit AND: if left is false, don't evaluate right
-        if node.op_token.type == TokenType.AND:
-            left_val = self.visit(node.left, context_row)
-            if not left_val:
-                return False
-            right_val = self.visit(node.right, context_row)
-            return bool(left_val and right_val)
-        
-        # Short-circuit OR: if left is true, don't evaluate right
-        elif node.op_token.type == TokenType.OR:
-            left_val = self.visit(node.left, context_row)
-            if left_val:
-                return True
-            right_val = self.visit(node.right, context_row)
-            return bool(left_val or right_val)
-
-    def visit_UnaryOpNode(self, node, context_row):
-        """Visits NOT nodes."""
-        operand_val = self.visit(node.operand, context_row)
-        if node.op_token.type == TokenType.NOT:
-            return not bool(operand_val)
-            
-    def visit_ComparisonNode(self, node, context_row):
-        """Visits comparison nodes (e.g., 'Heart Rate' > 100)."""
-        
-        # Get the value from the patient data
-        left_val = self.visit(node.left_identifier, context_row)
-        
-        # Get the value to compare against (could be a literal or another column)
-        right_val = self.visit(node.right_value, context_row)
-        
-        # Handle NULLs: any comparison with a NULL value is False
-        if pd.isna(left_val) or pd.isna(right_val):
-            return False
-            
-        # Perform the comparison
-        op = node.op_token.type
-        try:
-            if op == TokenType.GT: return left_val > right_val
-            if op == TokenType.LT: return left_val < right_val
-            if op == TokenType.GTE: return left_val >= right_val
-            if op == TokenType.LTE: return left_val <= right_val
-            if op == TokenType.EQ: return left_val == right_val
-            if op == TokenType.NEQ: return left_val != right_val
-        except TypeError as e:
-            # Catch type errors (e.g., 'Age' > "High")
-            raise ExecutorError(f"Type mismatch during comparison: {left_val} vs {right_val}. Error: {e}")
-
-    def visit_IsNullNode(self, node, context_row):
-        """Visits 'IS NULL' or 'IS NOT NULL' nodes."""
-        value = self.visit(node.identifier, context_row)
+    def apply_rule(self, node, context_mask, condition_mask):
+        """Runs the THEN/ELSE actions of a rule whose condition mask is already known."""
+        # Execute THEN branch on the rows where the condition holds
+        then_mask = self.columns.select(context_mask, condition_mask)
+        if then_mask.any():
+            for action_node in node.then_actions:
+                self.visit(action_node, then_mask)
+        self.columns.release_mask(then_mask)
         
-        is_null = pd.isna(value)
+        # Execute ELSE branch on the remaining rows
+        if node.else_actions is not None:
+            else_mask = self.columns.select(context_mask, condition_mask, negate=True)
+            if else_mask.any():
+                for action_node in node.else_actions:
+                    self.visit(action_node, else_mask)
+            self.columns.release_mask(else_mask)
         
-        return not is_null if node.is_not else is_null
+        return True
 
-    def visit_CountNode(self, node, context_row):
+    def visit_CountNode(self, node, context_mask):
         """
         Visits a COUNT node. Counts how many rows in the entire dataset
-        match the given condition. Uses caching to avoid re-computing
-        the same condition multiple times per rule.
-        """
-        # Create a cache key from the condition node's representation
-        condition_key = id(node.condition)
-        
-        # Check if we've already computed this count in this rule iteration
-        if condition_key in self.count_cache:
-            return self.count_cache[condition_key]
-        
-        count = 0
-        for row in self.all_rows:
-            try:
-                if self.visit(node.condition, row):
-                    count += 1
-            except Exception:
-                # Skip rows that cause errors in the count condition
-                pass
-        
-        # Cache the result for this rule iteration
-        self.count_cache[condition_key] = count
+        match the given condition. Results are cached by the structure of
+        the condition, so identical COUNTs in different rules are computed
+        once until a SET writes one of the columns they read.
+        """
+        condition_key = getattr(node, '_condition_key', None)
+        if condition_key is None:
+            condition_key = node._condition_key = structural_key(node.condition)
+            node._condition_reads = referenced_columns(node.condition)
+        
+        cached = self.count_cache.get(condition_key)
+        if cached is not None:
+            return cached[0]
+        
+        # NULL handling is part of the condition mask, so counting is a
+        # single reduction over the boolean array
+        self.columns.create_missing(node._columns)
+        counter = self.jit_counters.get(node)
+        if counter is not None:
+            count = counter(self.columns)
+        else:
+            condition_mask = self.compiled_condition(node)(self.columns)
+            count = self.columns.count(condition_mask)
+            self.columns.release_mask(condition_mask)
+        
+        self.count_cache[condition_key] = (count, node._condition_reads)
         return count
 
-    def visit_ValueNode(self, node, context_row):
+    def visit_ValueNode(self, node, context_mask):
         """Returns the raw literal value (String, Number, etc.)."""
         # Special case for NULL token
         if node.token.type == TokenType.NULL:
             return np.nan # Use numpy's NaN for our internal NULL representation
         return node.value
 
-    def visit_IdentifierNode(self, node, context_row):
-        """Gets a value from the patient data row (context)."""
-        if node.name not in context_row:
-            # This allows rules to SET a new variable and read it later
-            # (e.g., SET Fever = True ... IF Fever == True THEN ...)
-            context_row[node.name] = np.nan 
+    def visit_SetActionNode(self, node, context_mask):
+        """Executes a 'SET' action, modifying the selected patient rows."""
+        new_value = self.visit(node.value_node, context_mask)
+        column_to_set = node.identifier.name
+        self.columns.assign(column_to_set, context_mask, new_value)
         
-        return context_row.get(node.name)
+        # Drop cached COUNTs that read the column we just changed
+        stale_keys = [key for key, (_, reads) in self.count_cache.items() if column_to_set in reads]
+        for key in stale_keys:
+            del self.count_cache[key]
+        return True
 
-    def visit_SetActionNode(self, node, context_row):
-        """Executes a 'SET' action, modifying the patient row."""
-        new_value = self.visit(node.value_node, context_row)
-        column_to_set = node.identifier.name
+    ###########################################################################
+    # Condition Compilation
+    ###########################################################################
+
+    def _bind(self, actions):
+        """
+        Resolves every identifier read by a condition to its column slot
+        index (stored as '_col_idx'), and returns the names so that
+        execute() can reserve their slots in the column store.
+        """
+        names = set()
+        for action in actions or ():
+            if isinstance(action, RuleNode):
+                names |= self._bind_condition(action.condition)
+                names |= self._bind(action.then_actions) | self._bind(action.else_actions)
+            elif isinstance(action, SetActionNode) and isinstance(action.value_node, CountNode):
+                names |= self._bind_condition(action.value_node.condition)
+        return names
+
+    def _bind_condition(self, node):
+        """Binds the identifiers of one condition subtree."""
+        if isinstance(node, IdentifierNode):
+            node._col_idx = column_id(node.name)
+            return {node.name}
+        if isinstance(node, BinaryOpNode):
+            return self._bind_condition(node.left) | self._bind_condition(node.right)
+        if isinstance(node, UnaryOpNode):
+            return self._bind_condition(node.operand)
+        if isinstance(node, ComparisonNode):
+            return self._bind_condition(node.left_identifier) | self._bind_condition(node.right_value)
+        if isinstance(node, IsNullNode):
+            return self._bind_condition(node.identifier)
+        return set()
+
+    def precompile(self, actions=None):
+        """Compiles every rule and COUNT condition in the script ahead of execution."""
+        for node in self.ast.rules if actions is None else actions:
+            if isinstance(node, RuleNode):
+                self.compiled_condition(node)
+                self.precompile(node.then_actions)
+                if node.else_actions:
+                    self.precompile(node.else_actions)
+            elif isinstance(node, SetActionNode) and isinstance(node.value_node, CountNode):
+                self.compiled_condition(node.value_node)
+
+    def compiled_condition(self, node):
+        """
+        Returns the compiled condition of a RuleNode or CountNode, compiling
+        it on first use. The closure is cached on the node, so later
+        executions skip the AST walk entirely. A kernel from jit_compile()
+        takes precedence for this executor.
+        """
+        compiled = self.jit_conditions.get(node)
+        if compiled is None:
+            compiled = getattr(node, '_compiled_condition', None)
+        if compiled is None:
+            compiled = self._compile_function(node.condition)
+            # Prefer a fused numexpr kernel, then the Numba tape kernel, on
+            # tables of at least FUSED_MIN_ROWS rows
+            fused = None
+            if numexpr is not None and isinstance(node.condition, (BinaryOpNode, UnaryOpNode)):
+                fused = self._compile_numexpr(node.condition, compiled)
+            if fused is None:
+                fused = compile_tape_condition(node.condition, compiled, min_rows=FUSED_MIN_ROWS)
+            compiled = node._compiled_condition = self._memoized(node.condition, fused) if fused else compiled
+        return compiled
+
+    def jit_compile(self, actions=None):
+        """
+        Switches every rule condition that Numba can lower to a kernel
+        generated for that condition alone (see compile_rule_kernel), and
+        every such COUNT to a kernel that counts without building a mask
+        (see compile_count_kernel). Kernels are compiled on first use
+        against a large enough table, and only this executor uses them.
+        """
+        for node in self.ast.rules if actions is None else actions:
+            if isinstance(node, RuleNode):
+                self._jit_condition(node)
+                self.jit_compile(node.then_actions)
+                if node.else_actions:
+                    self.jit_compile(node.else_actions)
+            elif isinstance(node, SetActionNode) and isinstance(node.value_node, CountNode):
+                counter = compile_count_kernel(node.value_node.condition,
+                                               self._compile_function(node.value_node.condition))
+                if counter is not None:
+                    self.jit_counters[node.value_node] = counter
+
+    def _jit_condition(self, node):
+        """Replaces the compiled condition of one RuleNode or CountNode with a per-rule kernel."""
+        kernel = compile_rule_kernel(node.condition, self._compile_function(node.condition))
+        if kernel is not None:
+            self.jit_conditions[node] = self._memoized(node.condition, kernel)
+
+    def _compile_numexpr(self, node, fallback):
+        """
+        Fuses a composite numeric condition into a single numexpr kernel,
+        which evaluates the whole expression in one pass without
+        intermediate mask arrays. 'fallback' runs instead on tables under
+        FUSED_MIN_ROWS rows and when the condition reads a non-numeric
+        column. Returns None if the condition cannot be expressed in numexpr.
+        """
+        literals = []
+        translated = self._to_numexpr(node, {}, literals)
+        if translated is None:
+            return None
+        expression, variables = translated
+        variables = tuple(variables.items())
+        literals = tuple(literals)
+        
+        def fused(columns, _expression=expression, _variables=variables, _literals=literals, _fallback=fallback):
+            if columns.nrows < FUSED_MIN_ROWS:
+                return _fallback(columns)
+            local_dict = {}
+            for name, variable in _variables:
+                values = columns[name]
+                if not (isinstance(values, np.ndarray) and values.dtype.kind in 'iuf'):
+                    return _fallback(columns)
+                local_dict[variable] = values
+            for variable, name, value in _literals:
+                local_dict[variable] = literal_for(columns[name], value)
+            return numexpr.evaluate(_expression, local_dict=local_dict, truediv=True)
+        return fused
+
+    def _to_numexpr(self, node, variables, literals):
+        """
+        Translates a condition into a numexpr expression string, filling
+        'variables' with column name -> expression variable and 'literals'
+        with (variable, column name, value) for each numeric literal, so
+        the literal can take the column's precision at run time. Returns None
+        if the condition uses something numexpr cannot express (strings,
+        booleans, COUNT). 'x == x' guards keep NULL comparisons False.
+        """
+        if isinstance(node, BinaryOpNode):
+            left = self._to_numexpr(node.left, variables, literals)
+            right = self._to_numexpr(node.right, variables, literals)
+            if left is None or right is None:
+                return None
+            op = '&' if node.op_token.type == TokenType.AND else '|'
+            return f"({left[0]} {op} {right[0]})", variables
+        
+        if isinstance(node, UnaryOpNode):
+            operand = self._to_numexpr(node.operand, variables, literals)
+            return None if operand is None else (f"(~{operand[0]})", variables)
+        
+        if isinstance(node, IsNullNode):
+            var = variables.setdefault(node.identifier.name, f"c{len(variables)}")
+            return (f"({var} == {var})" if node.is_not else f"({var} != {var})"), variables
+        
+        if isinstance(node, ComparisonNode):
+            left = variables.setdefault(node.left_identifier.name, f"c{len(variables)}")
+            op = NUMEXPR_OPERATORS[node.op_token.type]
+            if isinstance(node.right_value, IdentifierNode):
+                right = variables.setdefault(node.right_value.name, f"c{len(variables)}")
+                return f"(({left} {op} {right}) & ({left} == {left}) & ({right} == {right}))", variables
+            if node.right_value.token.type == TokenType.NUMBER and is_number(node.right_value.value):
+                literal = f"k{len(literals)}"
+                literals.append((literal, node.left_identifier.name, node.right_value.value))
+                return f"(({left} {op} {literal}) & ({left} == {left}))", variables
+        
+        return None
+
+    def _compile(self, node):
+        """
+        Compiles a condition subtree into a closure over the column arrays.
+        Condition nodes compile to functions returning a boolean mask;
+        identifiers and literals compile to functions returning their value.
+        """
+        compiler = Executor._COMPILERS[node.kind]
+        if compiler is None:
+            raise ExecutorError(f"Cannot compile AST node type: {type(node).__name__}")
+        return self._memoized(node, compiler(self, node))
+
+    def _memoized(self, node, compiled):
+        """
+        Wraps the compiled closure of a subtree that occurs more than once
+        in the script, so its mask is computed once per execution and then
+        shared until a SET writes one of the columns it reads.
+        """
+        key = getattr(node, '_hash', None)
+        if key is None:
+            return compiled
         
-        # Modify the row in-place
-        context_row[column_to_set] = new_value
-        return True
\ No newline at end of file
+        def memoized(columns, _key=key, _reads=frozenset(referenced_columns(node)), _compiled=compiled):
+            cached = columns.mask_memo.get(_key)
+            if cached is not None:
+                return cached[0]
+            return columns.remember_mask(_key, _compiled(columns), _reads)
+        return memoized
+
+    def _compile_function(self, node):
+        """
+        Compiles a whole condition into a single Python function, built with
+        the ast module, so evaluating it runs one frame of straight-line
+        code instead of one closure call per node. The function behaves
+        exactly like the closure tree from _compile(), short-circuits
+        included. Subtrees shared with other conditions call their memoized
+        closure instead, so they still hit the mask cache.
+        """
+        namespace = {}
+        temporaries = []
+
+        def constant(value):
+            name = f"k{len(namespace)}"
+            namespace[name] = value
+            return ast.Name(name, ast.Load())
+
+        def assign(body, value):
+            # Every intermediate result goes to a fresh local, which keeps
+            # the evaluation order of the closures
+            name = f"t{len(temporaries)}"
+            temporaries.append(name)
+            body.append(ast.Assign([ast.Name(name, ast.Store())], value))
+            return name
+
+        def method(target, name, *args):
+            return ast.Call(ast.Attribute(ast.Name(target, ast.Load()), name, ast.Load()), list(args), [])
+
+        def emit(node, body, root=False):
+            """Appends the statements evaluating 'node' to 'body'; returns the local holding the result."""
+            if isinstance(node, ValueNode):
+                return assign(body, constant(self.visit_ValueNode(node, None)))
+            # Ordering comparisons keep their closure, which checks the kinds
+            # of both operands before comparing
+            if ((not root and getattr(node, '_hash', None) is not None) or Executor._COMPILERS[node.kind] is None
+                    or (isinstance(node, ComparisonNode) and node.op_token.type in ORDERING_OPERATORS)):
+                return assign(body, ast.Call(constant(self._compile(node)), [ast.Name('columns', ast.Load())], []))
+            
+            if isinstance(node, BinaryOpNode):
+                result = emit(node.left, body)
+                is_and = node.op_token.type == TokenType.AND
+                # The right side only runs when the left mask leaves rows undecided
+                test = method(result, 'any') if is_and else ast.UnaryOp(ast.Not(), method(result, 'all'))
+                right_body = []
+                right = emit(node.right, right_body)
+                right_body.append(ast.Assign([ast.Name(result, ast.Store())], method(
+                    'columns', 'and_masks' if is_and else 'or_masks',
+                    ast.Name(result, ast.Load()), ast.Name(right, ast.Load()))))
+                body.append(ast.If(test, right_body, []))
+                return result
+            
+            if isinstance(node, UnaryOpNode):
+                operand = emit(node.operand, body)
+                return assign(body, method('columns', 'not_mask', ast.Name(operand, ast.Load())))
+            
+            if isinstance(node, ComparisonNode):
+                left = emit(node.left_identifier, body)
+                right = emit(node.right_value, body)
+                return assign(body, method('columns', 'compare', constant(COMPARISON_UFUNCS[node.op_token.type]),
+                                           ast.Name(left, ast.Load()), ast.Name(right, ast.Load()),
+                                           constant(node.left_identifier.name)))
+            
+            if isinstance(node, IsNullNode):
+                result = assign(body, method('columns', 'is_null', constant(node.identifier.name)))
+                if node.is_not:
+                    result = assign(body, method('columns', 'not_mask', ast.Name(result, ast.Load())))
+                return result
+            
+            # IdentifierNode: the bound slot, or a name lookup for a missing column
+            result = assign(body, ast.Subscript(ast.Attribute(ast.Name('columns', ast.Load()), 'slots', ast.Load()),
+                                                ast.Constant(node._col_idx), ast.Load()))
+            body.append(ast.If(ast.Compare(ast.Name(result, ast.Load()), [ast.Is()], [ast.Constant(None)]),
+                               [ast.Assign([ast.Name(result, ast.Store())],
+                                           ast.Subscript(ast.Name('columns', ast.Load()),
+                                                         constant(node.name), ast.Load()))], []))
+            return result
+        
+        body = []
+        result = emit(node, body, root=True)
+        body.append(ast.Return(ast.Name(result, ast.Load())))
+        function = ast.FunctionDef(
+            name='condition',
+            args=ast.arguments(posonlyargs=[], args=[ast.arg('columns')], kwonlyargs=[], kw_defaults=[], defaults=[]),
+            body=body, decorator_list=[])
+        module = ast.fix_missing_locations(ast.Module(body=[function], type_ignores=[]))
+        exec(compile(module, '<condition>', 'exec'), namespace)
+        return self._memoized(node, namespace['condition'])
+
+    # Constants and column names are bound as default arguments, which turns
+    # each lookup into a local variable load instead of a closure/global load.
+
+    def _compile_BinaryOpNode(self, node):
+        """Compiles AND/OR nodes, short-circuiting when the left mask decides every row."""
+        left = self._compile(node.left)
+        right = self._compile(node.right)
+        
+        if node.op_token.type == TokenType.AND:
+            def and_op(columns, _left=left, _right=right):
+                left_mask = _left(columns)
+                # Short-circuit AND: if no row passed the left side, skip the right
+                if not left_mask.any():
+                    return left_mask
+                return columns.and_masks(left_mask, _right(columns))
+            return and_op
+        
+        def or_op(columns, _left=left, _right=right):
+            left_mask = _left(columns)
+            # Short-circuit OR: if every row passed the left side, skip the right
+            if left_mask.all():
+                return left_mask
+            return columns.or_masks(left_mask, _right(columns))
+        return or_op
+
+    def _compile_UnaryOpNode(self, node):
+        """Compiles NOT nodes."""
+        operand = self._compile(node.operand)
+        
+        def not_op(columns, _operand=operand):
+            return columns.not_mask(_operand(columns))
+        return not_op
+
+    def _compile_ComparisonNode(self, node):
+        """
+        Compiles comparison nodes (e.g., 'Heart Rate' > 100). An ordering
+        comparison checks the kinds of its operands first: one that cannot
+        work (e.g., 'Age' > "High") is False for every row and logged once
+        per execution, so evaluation never raises.
+        """
+        left = self._compile(node.left_identifier)
+        right = self._compile(node.right_value)
+        op_func = COMPARISON_UFUNCS[node.op_token.type]
+        
+        if node.op_token.type not in ORDERING_OPERATORS:
+            def comparison(columns, _left=left, _right=right, _op=op_func, _name=node.left_identifier.name):
+                return columns.compare(_op, _left(columns), _right(columns), _name)
+            return comparison
+        
+        def ordering(columns, _left=left, _right=right, _op=op_func, _name=node.left_identifier.name, _node=node):
+            type_error = comparison_type_error(columns, _node)
+            if type_error is not None:
+                columns.warn_once(_node, f"{type_error}. Comparison is False for all patients")
+                return columns.no_rows()
+            return columns.compare(_op, _left(columns), _right(columns), _name)
+        return ordering
+
+    def _compile_IsNullNode(self, node):
+        """Compiles 'IS NULL' or 'IS NOT NULL' nodes."""
+        if node.is_not:
+            def is_not_null(columns, _name=node.identifier.name):
+                return columns.not_mask(columns.is_null(_name))
+            return is_not_null
+        
+        def is_null(columns, _name=node.identifier.name):
+            return columns.is_null(_name)
+        return is_null
+
+    def _compile_ValueNode(self, node):
+        """Compiles a literal value into a constant function."""
+        value = self.visit_ValueNode(node, None)
+        
+        def literal(columns, _value=value):
+            return _value
+        return literal
+
+    def _compile_IdentifierNode(self, node):
+        """
+        Compiles a column reference into a positional lookup in the store's
+        slots. execute() binds a slot for every column a condition reads;
+        an empty slot means the column does not exist yet, and the name
+        lookup creates it filled with NULLs.
+        """
+        def column(columns, _index=node._col_idx, _name=node.name):
+            values = columns.slots[_index]
+            if values is None:
+                values = columns[_name]
+            return values
+        return column
+
+
+def kind_table(handlers, default):
+    """Builds a list indexed by node kind from a {node class: handler} dict."""
+    table = [default] * NODE_KINDS
+    for node_class, handler in handlers.items():
+        table[node_class.kind] = handler
+    return table
+
+# Node kind -> visitor, indexed directly instead of building a method
+# name and resolving it with getattr on every visit
+Executor._DISPATCH = kind_table({
+    RuleNode: Executor.visit_RuleNode,
+    SetActionNode: Executor.visit_SetActionNode,
+    CountNode: Executor.visit_CountNode,
+    ValueNode: Executor.visit_ValueNode,
+}, Executor.generic_visit)
+
+# Node kind -> compiler; None for nodes that are not part of a condition
+Executor._COMPILERS = kind_table({
+    BinaryOpNode: Executor._compile_BinaryOpNode,
+    UnaryOpNode: Executor._compile_UnaryOpNode,
+    ComparisonNode: Executor._compile_ComparisonNode,
+    IsNullNode: Executor._compile_IsNullNode,
+    ValueNode: Executor._compile_ValueNode,
+    IdentifierNode: Executor._compile_IdentifierNode,
+}, None)
+
+
+###############################################################################
+# Compiled Script Cache
+###############################################################################
+
+SCRIPT_CACHE_SIZE = 64
+_script_cache = OrderedDict()  # BLAKE2b digest of the source -> RuleScriptNode
+
+def compile_script(source, tokens=None):
+    """
+    Lexes, parses and compiles a rule script, returning its RuleScriptNode
+    with every condition already compiled. Results are kept in an LRU
+    cache keyed by a digest of the source text, so running the same script
+    against many datasets skips the Lexer, Parser and compilation after
+    the first call. A new source whose tokens match an earlier script's
+    (e.g., only comments changed) still gets that script's compiled AST
+    from parse_tokens(). Pass the result straight to Executor(ast).
+    'tokens' can be given when the caller has already lexed 'source'.
+    """
+    key = hashlib.blake2b(source.encode('utf-8')).digest()
+    ast = _script_cache.get(key)
+    if ast is not None:
+        _script_cache.move_to_end(key)
+        return ast
+    
+    ast = parse_tokens(Lexer(source).tokenize() if tokens is None else tokens)
+    Executor(ast).precompile()
+    
+    _script_cache[key] = ast
+    if len(_script_cache) > SCRIPT_CACHE_SIZE:
+        _script_cache.popitem(last=False)
+    return ast
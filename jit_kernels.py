@@ -0,0 +1,356 @@
+"""
+Numba Kernels for the Medical Triage Interpreter
+
+This module lowers a rule condition to a flat "tape" of integer opcodes
+and evaluates it row by row inside a single Numba-compiled loop. One
+kernel serves every rule: only the tape changes, so the JIT cost is paid
+once per process (and cached on disk).
+
+It can also generate Python source for a single condition and JIT it
+into a dedicated kernel (compile_rule_kernel), or into one that counts
+matching rows for COUNT without writing a mask (compile_count_kernel).
+That removes the opcode dispatch entirely, at the cost of one compilation
+per distinct condition.
+
+Both only cover numeric columns compared against numeric literals or
+other numeric columns. Anything else (strings, booleans, COUNT) falls
+back to the Python evaluator.
+
+Numba is optional; without it 'evaluate_tape' is None and no condition
+is lowered.
+"""
+
+import numpy as np
+from column_store import literal_for
+from lexer import TokenType
+from triage_parser import BinaryOpNode, UnaryOpNode, ComparisonNode, IsNullNode, IdentifierNode
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+# Opcodes. Each tape row is (opcode, a, b, rhs_is_column).
+OP_GT = 0
+OP_LT = 1
+OP_GTE = 2
+OP_LTE = 3
+OP_EQ = 4
+OP_NEQ = 5
+OP_IS_NULL = 6
+OP_IS_NOT_NULL = 7
+OP_AND = 10
+OP_OR = 11
+OP_NOT = 12
+
+COMPARISON_OPCODES = {
+    TokenType.GT: OP_GT,
+    TokenType.LT: OP_LT,
+    TokenType.GTE: OP_GTE,
+    TokenType.LTE: OP_LTE,
+    TokenType.EQ: OP_EQ,
+    TokenType.NEQ: OP_NEQ,
+}
+
+# Rows per work item handed to a thread
+CHUNK_SIZE = 4096
+
+# Below this many rows the JIT and column packing cost more than they save
+JIT_MIN_ROWS = 100_000
+
+
+def encode_condition(node):
+    """
+    Encodes a condition as a postfix tape. Returns (tape, constants,
+    constant_columns, column_names), or None if the condition cannot be
+    lowered. 'constant_columns' names the column each constant is compared
+    against.
+    """
+    tape = []
+    constants = []
+    constant_columns = []
+    column_index = {}
+
+    def column(name):
+        return column_index.setdefault(name, len(column_index))
+
+    def emit(node):
+        if isinstance(node, BinaryOpNode):
+            if not (emit(node.left) and emit(node.right)):
+                return False
+            tape.append((OP_AND if node.op_token.type == TokenType.AND else OP_OR, 0, 0, 0))
+            return True
+        if isinstance(node, UnaryOpNode):
+            if not emit(node.operand):
+                return False
+            tape.append((OP_NOT, 0, 0, 0))
+            return True
+        if isinstance(node, IsNullNode):
+            tape.append((OP_IS_NOT_NULL if node.is_not else OP_IS_NULL, column(node.identifier.name), 0, 0))
+            return True
+        if isinstance(node, ComparisonNode):
+            opcode = COMPARISON_OPCODES[node.op_token.type]
+            left = column(node.left_identifier.name)
+            if isinstance(node.right_value, IdentifierNode):
+                tape.append((opcode, left, column(node.right_value.name), 1))
+                return True
+            value = node.right_value.value
+            if node.right_value.token.type != TokenType.NUMBER:
+                return False
+            constants.append(float(value))
+            constant_columns.append(node.left_identifier.name)
+            tape.append((opcode, left, len(constants) - 1, 0))
+            return True
+        return False
+
+    if not emit(node):
+        return None
+    return (np.array(tape, dtype=np.int32).reshape(-1, 4),
+            np.array(constants or [0.0], dtype=np.float64),
+            constant_columns,
+            list(column_index))
+
+
+def _evaluate_tape(tape, constants, cols, out):
+    """Runs the tape for every row. 'cols' is a (columns x rows) float64 array."""
+    nrows = cols.shape[1]
+    ninstructions = tape.shape[0]
+    nchunks = (nrows + CHUNK_SIZE - 1) // CHUNK_SIZE
+    for chunk in numba.prange(nchunks):
+        stack = np.empty(ninstructions, dtype=np.bool_)
+        start = chunk * CHUNK_SIZE
+        end = min(nrows, start + CHUNK_SIZE)
+        for i in range(start, end):
+            sp = 0
+            for pc in range(ninstructions):
+                op = tape[pc, 0]
+                if op <= OP_NEQ:
+                    left = cols[tape[pc, 1], i]
+                    if tape[pc, 3]:
+                        right = cols[tape[pc, 2], i]
+                    else:
+                        right = constants[tape[pc, 2]]
+                    # Any comparison with a NULL value is False
+                    if np.isnan(left) or np.isnan(right):
+                        result = False
+                    elif op == OP_GT:
+                        result = left > right
+                    elif op == OP_LT:
+                        result = left < right
+                    elif op == OP_GTE:
+                        result = left >= right
+                    elif op == OP_LTE:
+                        result = left <= right
+                    elif op == OP_EQ:
+                        result = left == right
+                    else:
+                        result = left != right
+                    stack[sp] = result
+                    sp += 1
+                elif op == OP_IS_NULL:
+                    stack[sp] = np.isnan(cols[tape[pc, 1], i])
+                    sp += 1
+                elif op == OP_IS_NOT_NULL:
+                    stack[sp] = not np.isnan(cols[tape[pc, 1], i])
+                    sp += 1
+                elif op == OP_AND:
+                    sp -= 1
+                    stack[sp - 1] = stack[sp - 1] and stack[sp]
+                elif op == OP_OR:
+                    sp -= 1
+                    stack[sp - 1] = stack[sp - 1] or stack[sp]
+                else:
+                    stack[sp - 1] = not stack[sp - 1]
+            out[i] = stack[0]
+
+
+evaluate_tape = numba.njit(parallel=True, cache=True)(_evaluate_tape) if numba is not None else None
+
+
+def compile_tape_condition(node, fallback, min_rows=JIT_MIN_ROWS):
+    """
+    Returns a closure that evaluates 'node' with the Numba tape kernel,
+    or None if the condition cannot be lowered. 'fallback' runs instead
+    for tables under 'min_rows' rows and for columns that are not
+    numeric at run time.
+    """
+    if evaluate_tape is None:
+        return None
+    encoded = encode_condition(node)
+    if encoded is None:
+        return None
+    tape, constants, constant_columns, names = encoded
+
+    def taped(columns, _tape=tape, _constants=constants, _constant_columns=constant_columns,
+              _names=names, _fallback=fallback, _min_rows=min_rows):
+        if columns.nrows < _min_rows:
+            return _fallback(columns)
+        packed = np.empty((len(_names), columns.nrows), dtype=np.float64)
+        for index, name in enumerate(_names):
+            values = columns[name]
+            if not (isinstance(values, np.ndarray) and values.dtype.kind in 'iuf'):
+                return _fallback(columns)
+            packed[index] = values
+        # Literals take the precision of their column, as in NumPy
+        constants = np.array([literal_for(columns[name], value)
+                              for name, value in zip(_constant_columns, _constants)] or _constants,
+                             dtype=np.float64)
+        out = np.empty(columns.nrows, dtype=np.bool_)
+        evaluate_tape(_tape, constants, packed, out)
+        return out
+    return taped
+
+
+###############################################################################
+# Per-Rule Kernels
+###############################################################################
+
+# Source-level spelling of each comparison operator
+SOURCE_OPERATORS = {
+    TokenType.GT: '>',
+    TokenType.LT: '<',
+    TokenType.GTE: '>=',
+    TokenType.LTE: '<=',
+    TokenType.EQ: '==',
+    TokenType.NEQ: '!=',
+}
+
+# Generated source -> compiled kernel, shared by identical conditions
+RULE_KERNELS = {}
+
+def condition_source(node):
+    """
+    Translates a condition into a Python expression over row 'i' of the
+    column arguments c0, c1, ... and the literal arguments k0, k1, ...
+    Returns (expression, column_names, literals), where 'literals' holds
+    (column name, value) pairs, or None if the condition cannot be lowered.
+    """
+    column_index = {}
+    literals = []
+
+    def column(name):
+        return f"c{column_index.setdefault(name, len(column_index))}[i]"
+
+    def emit(node):
+        if isinstance(node, BinaryOpNode):
+            left = emit(node.left)
+            right = emit(node.right)
+            if left is None or right is None:
+                return None
+            return f"({left} {'and' if node.op_token.type == TokenType.AND else 'or'} {right})"
+        if isinstance(node, UnaryOpNode):
+            operand = emit(node.operand)
+            return None if operand is None else f"(not {operand})"
+        if isinstance(node, IsNullNode):
+            value = column(node.identifier.name)
+            # NaN is the only value not equal to itself
+            return f"({value} == {value})" if node.is_not else f"({value} != {value})"
+        if isinstance(node, ComparisonNode):
+            op = SOURCE_OPERATORS[node.op_token.type]
+            left = column(node.left_identifier.name)
+            if isinstance(node.right_value, IdentifierNode):
+                right = column(node.right_value.name)
+            elif node.right_value.token.type == TokenType.NUMBER:
+                right = f"k{len(literals)}"
+                literals.append((node.left_identifier.name, node.right_value.value))
+            else:
+                return None
+            # NaN already compares False except under !=, which needs guards
+            if op == '!=':
+                return f"({left} != {right} and {left} == {left} and {right} == {right})"
+            return f"({left} {op} {right})"
+        return None
+
+    expression = emit(node)
+    if expression is None:
+        return None
+    return expression, list(column_index), literals
+
+
+def kernel_for(source):
+    """Compiles generated kernel source once; identical conditions share the kernel."""
+    kernel = RULE_KERNELS.get(source)
+    if kernel is None:
+        namespace = {'numba': numba}
+        exec(source, namespace)
+        # fastmath is left off: it assumes no NaNs, and NaN is NULL here
+        kernel = RULE_KERNELS[source] = numba.njit(parallel=True, boundscheck=False)(namespace['kernel'])
+    return kernel
+
+
+def kernel_arguments(columns, names, literals):
+    """
+    Returns the column arrays and literals a generated kernel takes, or
+    None if a column is not numeric NumPy data.
+    """
+    values = []
+    for name in names:
+        column_values = columns[name]
+        if not (isinstance(column_values, np.ndarray) and column_values.dtype.kind in 'iuf'):
+            return None
+        values.append(column_values)
+    # Literals take the precision of their column, as in NumPy
+    values.extend(literal_for(columns[name], value) for name, value in literals)
+    return values
+
+
+def compile_rule_kernel(node, fallback):
+    """
+    Returns a closure that evaluates 'node' with a Numba kernel generated
+    for this condition alone, or None if it cannot be lowered. The kernel
+    is compiled on the first call that reaches JIT_MIN_ROWS rows; smaller
+    tables and non-numeric columns run 'fallback' instead.
+    """
+    if numba is None:
+        return None
+    translated = condition_source(node)
+    if translated is None:
+        return None
+    expression, names, literals = translated
+    arguments = [f"c{index}" for index in range(len(names))] + [f"k{index}" for index in range(len(literals))]
+    source = (f"def kernel({', '.join(arguments)}, out):\n"
+              f"    for i in numba.prange(out.shape[0]):\n"
+              f"        out[i] = {expression}\n")
+
+    def kernel_condition(columns, _source=source, _names=names, _literals=literals, _fallback=fallback):
+        if columns.nrows < JIT_MIN_ROWS:
+            return _fallback(columns)
+        values = kernel_arguments(columns, _names, _literals)
+        if values is None:
+            return _fallback(columns)
+        out = columns.take_mask()
+        kernel_for(_source)(*values, out)
+        return out
+    return kernel_condition
+
+
+def compile_count_kernel(node, fallback):
+    """
+    Returns a closure that counts the rows matching 'node' with a Numba
+    kernel generated for this condition, summing matches as it goes
+    instead of writing a mask; or None if it cannot be lowered. Small
+    tables and non-numeric columns count the mask 'fallback' returns.
+    """
+    if numba is None:
+        return None
+    translated = condition_source(node)
+    if translated is None:
+        return None
+    expression, names, literals = translated
+    arguments = [f"c{index}" for index in range(len(names))] + [f"k{index}" for index in range(len(literals))]
+    source = (f"def kernel({', '.join(arguments)}, nrows):\n"
+              f"    total = 0\n"
+              f"    for i in numba.prange(nrows):\n"
+              f"        if {expression}:\n"
+              f"            total += 1\n"
+              f"    return total\n")
+
+    def kernel_count(columns, _source=source, _names=names, _literals=literals, _fallback=fallback):
+        values = kernel_arguments(columns, _names, _literals) if columns.nrows >= JIT_MIN_ROWS else None
+        if values is None:
+            mask = _fallback(columns)
+            count = columns.count(mask)
+            columns.release_mask(mask)
+            return count
+        return int(kernel_for(_source)(*values, columns.nrows))
+    return kernel_count
@@ -8,50 +8,58 @@ This fulfills Section 5 (Implementation) for the Lexer.
 """
 
 import re
-from enum import Enum
+import sys
+from enum import IntEnum
 from error_handler import LexerError
 
 # Define all possible token types our language supports.
 # This aligns with Section 2 (Input Language)
-class TokenType(Enum):
+# Members are small ints, so the parser's token type checks are plain
+# integer comparisons instead of Enum.__eq__ calls.
+class TokenType(IntEnum):
     # Keywords
-    IF = 'IF'
-    THEN = 'THEN'
-    ELSE = 'ELSE'  # NEW: ELSE keyword
-    SET = 'SET'
-    AND = 'AND'
-    OR = 'OR'
-    NOT = 'NOT'
-    IS = 'IS'
-    NULL = 'NULL'
-    COUNT = 'COUNT'  # NEW: COUNT function
-    WHERE = 'WHERE'  # NEW: WHERE clause for COUNT
+    IF = 1
+    THEN = 2
+    ELSE = 3  # NEW: ELSE keyword
+    SET = 4
+    AND = 5
+    OR = 6
+    NOT = 7
+    IS = 8
+    NULL = 9
+    COUNT = 10  # NEW: COUNT function
+    WHERE = 11  # NEW: WHERE clause for COUNT
     
     # Data Types / Values
-    NUMBER = 'NUMBER'     # 100, 98.6
-    STRING = 'STRING'     # "Critical", "Male"
-    BOOLEAN = 'BOOLEAN'   # True, False
-    IDENTIFIER = 'IDENTIFIER' # 'Heart Rate', 'Age' (using strings for multi-word)
+    NUMBER = 12     # 100, 98.6
+    STRING = 13     # "Critical", "Male"
+    BOOLEAN = 14    # True, False
+    IDENTIFIER = 15 # 'Heart Rate', 'Age' (using strings for multi-word)
     
     # Operators
-    GT = '>'
-    LT = '<'
-    GTE = '>='
-    LTE = '<='
-    EQ = '==' # Equality check
-    NEQ = '!=' # Not equal
-    ASSIGN = '=' # Assignment (for SET)
+    GT = 16     # >
+    LT = 17     # <
+    GTE = 18    # >=
+    LTE = 19    # <=
+    EQ = 20     # == Equality check
+    NEQ = 21    # != Not equal
+    ASSIGN = 22 # = Assignment (for SET)
     
     # Punctuation
-    LPAREN = '('
-    RPAREN = ')'
-    NEWLINE = '\n'
+    LPAREN = 23 # (
+    RPAREN = 24 # )
+    NEWLINE = 25
     
     # End of File
-    EOF = 'EOF'
+    EOF = 26
 
 class Token:
-    """A simple data class to represent a single token."""
+    """
+    A simple data class to represent a single token. __slots__ drops the
+    per-instance __dict__, since a script produces one Token per word.
+    """
+    __slots__ = ('type', 'value', 'line', 'col')
+    
     def __init__(self, type, value, line=1, col=1):
         self.type = type
         self.value = value
@@ -79,9 +87,158 @@ RESERVED_KEYWORDS = {
     'WHERE': TokenType.WHERE,  # NEW
 }
 
+# Character classes of non-ASCII characters, as bit flags
+DIGIT = 1       # str.isdigit()
+ALPHA = 2       # str.isalpha(): starts a keyword
+
+def classify(char):
+    """Returns the character class flags of a single character."""
+    flags = 0
+    if char.isdigit():
+        flags |= DIGIT
+    if char.isalpha():
+        flags |= ALPHA
+    return flags
+
+# Flags of the first 256 code points, indexed by ord(); rarer characters
+# go through classify(). ASCII characters dispatch through CHAR_HANDLERS.
+CHAR_CLASS = bytes(classify(chr(code)) for code in range(256))
+
+# RESERVED_KEYWORDS bucketed by length: KEYWORDS_BY_LENGTH[n] holds the
+# (keyword, TokenType) pairs of length n. Keywords are 2-5 characters, so
+# most words are rejected by the length alone, and an exact-case match
+# needs no upper() copy and no hashing.
+MAX_KEYWORD_LENGTH = max(map(len, RESERVED_KEYWORDS))
+KEYWORDS_BY_LENGTH = [
+    tuple((keyword, token_type) for keyword, token_type in RESERVED_KEYWORDS.items() if len(keyword) == length)
+    for length in range(MAX_KEYWORD_LENGTH + 1)
+]
+
+def lookup_keyword(word):
+    """
+    Returns (KEYWORD, TokenType) for a case-insensitive keyword match of
+    'word', or (word.upper(), TokenType.IDENTIFIER) if it is not reserved.
+    """
+    length = len(word)
+    if length > MAX_KEYWORD_LENGTH:
+        return word.upper(), TokenType.IDENTIFIER
+    bucket = KEYWORDS_BY_LENGTH[length]
+    for keyword, token_type in bucket:
+        if word == keyword:
+            return keyword, token_type
+    # Not upper case as written; compare case-insensitively
+    upper = word.upper()
+    for keyword, token_type in bucket:
+        if upper == keyword:
+            return keyword, token_type
+    return upper, TokenType.IDENTIFIER
+
+# Operator and punctuation spellings mapped to their TokenTypes
+OPERATOR_TOKENS = {
+    '>=': TokenType.GTE,
+    '<=': TokenType.LTE,
+    '==': TokenType.EQ,
+    '!=': TokenType.NEQ,
+    '>': TokenType.GT,
+    '<': TokenType.LT,
+    '=': TokenType.ASSIGN,
+    '(': TokenType.LPAREN,
+    ')': TokenType.RPAREN,
+}
+
+# TokenType -> the one string object used as the value of every operator
+# token of that type, so scanning an operator allocates no new string
+TOKEN_VALUES = {token_type: sys.intern(spelling) for spelling, token_type in OPERATOR_TOKENS.items()}
+
+# Operator first character -> (TokenType alone, TokenType when followed by '=')
+OPERATOR_PAIRS = {}
+for spelling, token_type in OPERATOR_TOKENS.items():
+    single_type, double_type = OPERATOR_PAIRS.get(spelling[0], (None, None))
+    if len(spelling) == 1:
+        OPERATOR_PAIRS[spelling] = (token_type, double_type)
+    else:
+        OPERATOR_PAIRS[spelling[0]] = (single_type, token_type)
+del spelling, token_type, single_type, double_type
+
+# The token grammar, shared by both scanners: (group name, pattern) pairs,
+# tried in order. Most alternatives start with distinct characters, so
+# the most frequent tokens in rule scripts are listed first. The fallbacks
+# must stay behind what they catch: a quote without a closing partner
+# falls through to UNTERMINATED, a lone '!' to BANG, and any other
+# character ends up in BAD. Operators are listed longest first in
+# OPERATOR_TOKENS, so '>=' wins over '>'.
+TOKEN_SPEC = [
+    ('WS', r'[ \t\r]+'),
+    ('IDENT', r'[A-Za-z][A-Za-z0-9_]*'),
+    ('QIDENT', r"'[^']*'"),
+    ('OP', '|'.join(map(re.escape, OPERATOR_TOKENS))),
+    ('NUMBER', r'\d[\d.]*'),
+    ('NL', r'\n'),
+    ('STRING', r'"[^"]*"'),
+    ('COMMENT', r'\#[^\n]*'),
+    ('UNTERMINATED', r'["\']'),
+    ('BANG', r'!'),
+    ('BAD', r'.'),
+]
+TOKEN_PATTERNS = dict(TOKEN_SPEC)
+
+# One regex matching every token of an ASCII script. tokenize() walks it
+# with finditer, so the scanning loop runs inside the regex engine.
+MASTER_RE = re.compile('|'.join(f'(?P<{name}>{pattern})' for name, pattern in TOKEN_SPEC), re.ASCII)
+
+# Runs the character-level scanner consumes with one regex match: the
+# skipped WS and COMMENT tokens, and words. \w matches exactly the
+# characters for which str.isalnum() is true, plus '_'.
+SKIP_RE = re.compile(f"(?:{TOKEN_PATTERNS['WS']}|{TOKEN_PATTERNS['COMMENT']})+")
+WORD_RE = re.compile(r'\w+')
+
+def make_number(text, line, col):
+    """Builds a NUMBER token from digits with an optional decimal point."""
+    if text.count('.') > 1:
+        raise LexerError(f"Invalid number: {text}", line, col)
+    if '.' in text:
+        return Token(TokenType.NUMBER, float(text), line, col)
+    return Token(TokenType.NUMBER, int(text), line, col)
+
+def make_keyword(text, line, col):
+    """Builds a keyword or BOOLEAN token; other bare words are errors."""
+    upper, token_type = lookup_keyword(text)
+    if token_type == TokenType.BOOLEAN:
+        return Token(token_type, upper == 'TRUE', line, col)
+    if token_type == TokenType.IDENTIFIER:
+        raise LexerError(f"Invalid or unquoted identifier: '{text}'. Use single quotes for column names (e.g., 'Heart Rate').", line, col)
+    return Token(token_type, upper, line, col)
+
+def make_operator(text, line, col):
+    """Builds an operator or parenthesis token."""
+    token_type = OPERATOR_TOKENS[text]
+    return Token(token_type, TOKEN_VALUES[token_type], line, col)
+
+def reject_bang(text, line, col):
+    raise LexerError(f"Invalid character '!' (did you mean '!=')?", line, col)
+
+def reject_character(text, line, col):
+    raise LexerError(f"Invalid character: '{text}'", line, col)
+
+# MASTER_RE group name -> function building the token from (text, line, col).
+# Newlines, quoted text and skipped text are handled inline in tokenize().
+TOKEN_MAKERS = {
+    'NUMBER': make_number,
+    'IDENT': make_keyword,
+    'OP': make_operator,
+    'BANG': reject_bang,
+    'BAD': reject_character,
+}
+
 class Lexer:
     """
     The Lexer class, responsible for tokenizing the input string.
+    
+    tokenize() scans the whole script with MASTER_RE. The character-level
+    methods (get_next_token() and its helpers) produce the same tokens
+    one at a time from the same TOKEN_SPEC tables; tokenize() uses them
+    for scripts with non-ASCII text, where str.isalpha()/isdigit()
+    accept more than the regex does.
     """
     def __init__(self, text):
         self.text = text
@@ -97,33 +254,57 @@ class Lexer:
             self.line += 1
             self.col = 0
             
-        self.pos += 1
-        if self.pos < len(self.text):
-            self.current_char = self.text[self.pos]
+        text = self.text
+        pos = self.pos = self.pos + 1
+        if pos < len(text):
+            self.current_char = text[pos]
             self.col += 1
         else:
             self.current_char = None
 
+    def advance_to(self, end):
+        """
+        Moves 'pos' to 'end' in one step, updating 'line', 'col' and
+        'current_char' exactly as calling advance() once per character would.
+        """
+        text = self.text
+        newlines = text.count('\n', self.pos, end)
+        if newlines:
+            self.line += newlines
+            self.col = end - text.rindex('\n', self.pos, end)
+        else:
+            self.col += end - self.pos
+        self.pos = end
+        if end < len(text):
+            self.current_char = text[end]
+        else:
+            # Stepping onto the end of the text does not advance the column
+            self.col -= 1
+            self.current_char = None
+
     def skip_whitespace(self):
         """Skip over spaces, tabs, and comments (but NOT newlines)."""
-        while self.current_char is not None:
-            # Skip spaces and tabs only; preserve newlines as tokens
-            if self.current_char in (' ', '\t', '\r'):
-                self.advance()
-            # Also add comment skipping (skip until newline but don't consume it)
-            elif self.current_char == '#':
-                while self.current_char is not None and self.current_char != '\n':
-                    self.advance()
-            else:
-                break
+        # Spaces and tabs only; newlines are preserved as tokens, and a
+        # comment runs up to (but does not consume) the next newline
+        match = SKIP_RE.match(self.text, self.pos)
+        if match:
+            self.advance_to(match.end())
             
     def get_number(self):
         """Parse a number (integer or float)."""
-        result = ''
         start_col = self.col
-        while self.current_char is not None and (self.current_char.isdigit() or self.current_char == '.'):
-            result += self.current_char
-            self.advance()
+        # Scan on locals, then slice the number out and move once
+        text = self.text
+        start = pos = self.pos
+        n = len(text)
+        char_class = CHAR_CLASS
+        while pos < n:
+            char = text[pos]
+            if not (char == '.' or (char_class[ord(char)] if char < '\u0100' else classify(char)) & DIGIT):
+                break
+            pos += 1
+        result = text[start:pos]
+        self.advance_to(pos)
             
         if result.count('.') > 1:
             raise LexerError(f"Invalid number: {result}", self.line, start_col)
@@ -135,18 +316,18 @@ class Lexer:
 
     def get_string(self, quote_char):
         """Parse a string literal (e.g., "Critical" or 'Heart Rate')."""
-        result = ''
         start_col = self.col
-        self.advance() # Skip opening quote
-        
-        while self.current_char is not None and self.current_char != quote_char:
-            result += self.current_char
-            self.advance()
+        # Find the closing quote and slice the contents out in one step
+        text = self.text
+        start = self.pos + 1 # Skip opening quote
+        end = text.find(quote_char, start)
             
-        if self.current_char is None:
+        if end == -1:
+            self.advance_to(len(text))
             raise LexerError(f"Unterminated string", self.line, start_col)
             
-        self.advance() # Skip closing quote
+        result = text[start:end]
+        self.advance_to(end + 1) # Skip closing quote
         
         # Determine if it's a quoted identifier or a simple string value
         token_type = TokenType.IDENTIFIER if quote_char == "'" else TokenType.STRING
@@ -157,95 +338,75 @@ class Lexer:
         result = ''
         start_col = self.col
         
-        # Simple identifiers (no spaces)
-        while self.current_char is not None and (self.current_char.isalnum() or self.current_char == '_'):
-            result += self.current_char
-            self.advance()
+        # Simple identifiers (no spaces): letters, digits and '_'
+        match = WORD_RE.match(self.text, self.pos)
+        if match:
+            result = match.group()
+            self.advance_to(match.end())
 
         # Check if it's a reserved keyword
-        token_type = RESERVED_KEYWORDS.get(result.upper(), TokenType.IDENTIFIER)
+        upper, token_type = lookup_keyword(result)
         
         # Convert boolean strings to actual booleans
         if token_type == TokenType.BOOLEAN:
-            value = True if result.upper() == 'TRUE' else False
+            value = True if upper == 'TRUE' else False
             return Token(token_type, value, self.line, start_col)
         
         # Disallow unquoted identifiers for simplicity, except for keywords
         if token_type == TokenType.IDENTIFIER:
              raise LexerError(f"Invalid or unquoted identifier: '{result}'. Use single quotes for column names (e.g., 'Heart Rate').", self.line, start_col)
 
-        return Token(token_type, result.upper(), self.line, start_col)
+        return Token(token_type, upper, self.line, start_col)
+
+    def get_newline(self):
+        """Emit NEWLINE tokens instead of skipping them."""
+        token = Token(TokenType.NEWLINE, '\n', self.line, self.col)
+        self.advance()
+        return token
+
+    def get_quoted(self):
+        """Parse a string literal ("...", for values) or quoted identifier ('...', for column names)."""
+        return self.get_string(self.current_char)
+
+    def get_operator(self):
+        """Parse an operator or parenthesis, preferring the two-character form (e.g., '>=')."""
+        start_col = self.col
+        char = self.current_char
+        single_type, double_type = OPERATOR_PAIRS[char]
+        self.advance()
+        if double_type is not None and self.current_char == '=':
+            self.advance()
+            return Token(double_type, TOKEN_VALUES[double_type], self.line, start_col)
+        if single_type is None:
+            raise LexerError(f"Invalid character '!' (did you mean '!=')?", self.line, start_col)
+        return Token(single_type, TOKEN_VALUES[single_type], self.line, start_col)
 
     def get_next_token(self):
         """Get the next token from the input string."""
+        handlers = CHAR_HANDLERS
         while self.current_char is not None:
-            start_col = self.col
-            
-            # Emit NEWLINE tokens instead of skipping them
-            if self.current_char == '\n':
-                token = Token(TokenType.NEWLINE, '\n', self.line, self.col)
-                self.advance()
-                return token
-            
-            if self.current_char in (' ', '\t', '\r') or self.current_char == '#':
-                self.skip_whitespace()
-                continue
-                
-            if self.current_char.isdigit():
-                return self.get_number()
-
-            # String literal (for values)
-            if self.current_char == '"':
-                return self.get_string('"')
-            
-            # Quoted Identifier (for column names)
-            if self.current_char == "'":
-                return self.get_string("'")
-                
-            # Keywords or simple IDs
-            if self.current_char.isalpha():
-                return self.get_id_or_keyword()
-
-            # Operators
-            if self.current_char == '>':
-                self.advance()
-                if self.current_char == '=':
-                    self.advance()
-                    return Token(TokenType.GTE, '>=', self.line, start_col)
-                return Token(TokenType.GT, '>', self.line, start_col)
-                
-            if self.current_char == '<':
-                self.advance()
-                if self.current_char == '=':
-                    self.advance()
-                    return Token(TokenType.LTE, '<=', self.line, start_col)
-                return Token(TokenType.LT, '<', self.line, start_col)
-                
-            if self.current_char == '=':
-                self.advance()
-                if self.current_char == '=':
-                    self.advance()
-                    return Token(TokenType.EQ, '==', self.line, start_col)
-                return Token(TokenType.ASSIGN, '=', self.line, start_col)
-                
-            if self.current_char == '!':
-                self.advance()
-                if self.current_char == '=':
-                    self.advance()
-                    return Token(TokenType.NEQ, '!=', self.line, start_col)
-                else:
-                    raise LexerError(f"Invalid character '!' (did you mean '!=')?", self.line, start_col)
+            char = self.current_char
+            code = ord(char)
             
-            # Punctuation
-            if self.current_char == '(':
-                self.advance()
-                return Token(TokenType.LPAREN, '(', self.line, start_col)
-            if self.current_char == ')':
-                self.advance()
-                return Token(TokenType.RPAREN, ')', self.line, start_col)
+            if code < 128:
+                # ASCII characters dispatch through a table indexed by ord();
+                # whitespace and comment handlers return None
+                handler = handlers[code]
+                if handler is not None:
+                    token = handler(self)
+                    if token is None:
+                        continue
+                    return token
+            else:
+                # Unicode digits and letters, as str.isdigit()/isalpha() see them
+                flags = CHAR_CLASS[code] if code < 256 else classify(char)
+                if flags & ALPHA:
+                    return self.get_id_or_keyword()
+                if flags & DIGIT:
+                    return self.get_number()
                 
-            # If we get here, the character is invalid
-            char = self.current_char
+            # If we get here, the character is invalid (unlikely)
+            start_col = self.col
             self.advance()
             raise LexerError(f"Invalid character: '{char}'", self.line, start_col)
 
@@ -254,10 +415,79 @@ class Lexer:
 
     def tokenize(self):
         """Return a list of all tokens from the input text."""
+        text = self.text
+        if self.pos != 0 or not text.isascii():
+            return self.tokenize_by_character()
+        
         tokens = []
-        token = self.get_next_token()
-        while token.type != TokenType.EOF:
-            tokens.append(token)
-            token = self.get_next_token()
-        tokens.append(token) # Add EOF
-        return tokens
\ No newline at end of file
+        append = tokens.append
+        makers = TOKEN_MAKERS
+        line = 1
+        line_start = 0  # Index of the first character of the current line
+        
+        for match in MASTER_RE.finditer(text):
+            kind = match.lastgroup
+            if kind == 'WS' or kind == 'COMMENT':
+                continue
+            
+            start = match.start()
+            col = start - line_start + 1
+            
+            if kind == 'NL':
+                append(Token(TokenType.NEWLINE, '\n', line, col))
+                line += 1
+                line_start = start + 1
+            elif kind == 'STRING' or kind == 'QIDENT':
+                value = match.group()[1:-1]
+                # A string may span lines; its token reports the line it ends on
+                newlines = value.count('\n')
+                if newlines:
+                    line += newlines
+                    line_start = start + 2 + value.rindex('\n')
+                append(Token(TokenType.STRING if kind == 'STRING' else TokenType.IDENTIFIER, value, line, col))
+            elif kind == 'UNTERMINATED':
+                raise LexerError(f"Unterminated string", line + text.count('\n', start), col)
+            else:
+                append(makers[kind](match.group(), line, col))
+        
+        # EOF is reported at the column of the last character
+        self.pos = len(text)
+        self.current_char = None
+        self.line = line
+        self.col = len(text) - line_start if text else 1
+        append(Token(TokenType.EOF, None, self.line, self.col))
+        return tokens
+
+    def tokenize_by_character(self):
+        """Return a list of all tokens, scanning one character at a time."""
+        # Every token but EOF covers at least one character, so the list
+        # is sized once up front and trimmed to the tokens found
+        tokens = [None] * (len(self.text) - self.pos + 1)
+        count = 0
+        get_next_token = self.get_next_token
+        eof = TokenType.EOF
+        while True:
+            token = get_next_token()
+            tokens[count] = token
+            count += 1
+            if token.type is eof:
+                break
+        del tokens[count:]
+        return tokens
+
+
+# ord(char) -> Lexer method scanning the token that starts with an ASCII
+# character; None marks characters that cannot start a token
+CHAR_HANDLERS = [None] * 128
+for char in ' \t\r#':
+    CHAR_HANDLERS[ord(char)] = Lexer.skip_whitespace
+for char in '0123456789':
+    CHAR_HANDLERS[ord(char)] = Lexer.get_number
+for char in 'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz':
+    CHAR_HANDLERS[ord(char)] = Lexer.get_id_or_keyword
+for char in '"\'':
+    CHAR_HANDLERS[ord(char)] = Lexer.get_quoted
+for char in OPERATOR_PAIRS:
+    CHAR_HANDLERS[ord(char)] = Lexer.get_operator
+CHAR_HANDLERS[ord('\n')] = Lexer.get_newline
+del char
@@ -1,47 +1,80 @@
 """
 Main entry point for the Medical Triage Interpreter.
 
-This file is respons        # Hospital alert thresholds (adjustable)
-        if high_risk_count > 50:
-            hospital_alert = "CRITICAL ALERT"
-            alert_level = 2
-        elif high_risk_count > 20:
-            hospital_alert = "WARNING ALERT"
-            alert_level = 1
-        else:
-            hospital_alert = "NORMAL"
-            alert_level = 0
+This file is responsible for:
 1. Reading the rule script(s) from the /tests directory.
-2. Reading the patient data from the /data directory.
+2. Reading the patient data from the /data directory (the Parquet copy
+   written by prepare_data.py when present and up to date, otherwise
+   the CSV).
 3. Running the full interpreter pipeline:
    - Lexer: Tokenizes the rule script.
    - Parser: Creates an Abstract Syntax Tree (AST) from tokens.
    - Executor: Loads data and executes the AST against it.
 4. Printing the final triaged data to the console.
 
+Environment switches:
+   - TRIAGE_JIT=1 compiles every numeric rule and COUNT condition to
+     its own Numba kernel (needs numba; ignored without it).
+   - TRIAGE_NARROW=1 loads the vitals with int16/float32 column types.
+
 This demonstrates Section 6 (Testing) for the full system.
 """
 
+import io
+import mmap
+import os
 import sys
 from pathlib import Path
 import pandas as pd
 from lexer import Lexer
-from triage_parser import Parser
-from executor import Executor
+from executor import Executor, compile_script
 from error_handler import TriageError
 
 # --- File Paths ---
 # Resolve paths relative to this file so the script works from any CWD
 BASE_DIR = Path(__file__).resolve().parent
-DATA_FILEPATH = BASE_DIR / 'data' / 'human_vital_sign.csv'
+CSV_FILEPATH = BASE_DIR / 'data' / 'human_vital_sign.csv'
+PARQUET_FILEPATH = CSV_FILEPATH.with_suffix('.parquet')
+
+def data_filepath(csv_path, parquet_path):
+    """
+    Returns the Parquet copy written by prepare_data.py when it exists and
+    is at least as new as the CSV, since it skips CSV parsing. A CSV
+    changed after the copy was written is read instead of the stale copy.
+    """
+    if not parquet_path.exists():
+        return csv_path
+    if csv_path.exists() and csv_path.stat().st_mtime > parquet_path.stat().st_mtime:
+        return csv_path
+    return parquet_path
+
+DATA_FILEPATH = data_filepath(CSV_FILEPATH, PARQUET_FILEPATH)
 VALID_RULES_FILEPATH = BASE_DIR / 'tests' / 'test_valid_inputs.txt'
 INVALID_RULES_FILEPATH = BASE_DIR / 'tests' / 'text_invalid_inputs.txt'
 
+# Set TRIAGE_NARROW=1 to load vitals as int16/float32 (less memory, but
+# float32 can round values near decimal thresholds the other way)
+NARROW = os.environ.get('TRIAGE_NARROW') == '1'
+# Set TRIAGE_JIT=1 to run rule conditions as per-rule Numba kernels
+JIT = os.environ.get('TRIAGE_JIT') == '1'
+
 def read_file_content(filepath):
-    """Helper function to read a file and return its content."""
+    """
+    Helper function to read a file and return its content. The file is
+    memory-mapped and decoded straight from the mapping, so its bytes are
+    never copied into a read buffer; line endings are normalized to '\n'
+    as text mode would.
+    """
     try:
-        with open(filepath, 'r') as f:
-            return f.read()
+        with open(filepath, 'rb') as f:
+            # An empty file cannot be mapped
+            if os.fstat(f.fileno()).st_size == 0:
+                return ''
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                content = str(mapped, 'utf-8')
+        if '\r' in content:
+            content = content.replace('\r\n', '\n').replace('\r', '\n')
+        return content
     except FileNotFoundError:
         print(f"Fatal Error: File not found at {filepath}", file=sys.stderr)
         print("Please ensure the file exists and you are running main.py from the project's root directory.", file=sys.stderr)
@@ -50,10 +83,12 @@ def read_file_content(filepath):
         print(f"Fatal Error: Could not read file at {filepath}. Error: {e}", file=sys.stderr)
         sys.exit(1)
 
-def run_interpreter(rule_script, data_filepath):
+def run_interpreter(rule_script, data_filepath, backend="numpy", jit=JIT, narrow=NARROW):
     """
     Runs the full Lexer -> Parser -> Executor pipeline on a given
-    rule script and data file.
+    rule script and data file. 'backend' and 'narrow' are passed to the
+    Executor ("numpy", or "cudf" to run on the GPU). With 'jit', every
+    numeric rule condition is compiled to its own Numba kernel.
     """
     print("--- Medical Triage Interpreter ---")
     print(f"Loading rules...\n{rule_script}")
@@ -66,27 +101,33 @@ def run_interpreter(rule_script, data_filepath):
         tokens = lexer.tokenize()
         print(f"Lexer found {len(tokens)} tokens.")
         
-        # 2. PARSER: Build the Abstract Syntax Tree
+        # 2. PARSER: Build the Abstract Syntax Tree, with every condition
+        # compiled (reused when the same script runs again)
         print("[2/3] Running Parser...")
-        parser = Parser(tokens)
-        ast = parser.parse()
+        ast = compile_script(rule_script, tokens)
         print(f"Parser created AST with {len(ast.rules)} rules.")
         
         # 3. EXECUTOR: Load data and run the rules
         print("[3/3] Running Executor...")
-        executor = Executor(ast)
+        executor = Executor(ast, backend=backend, narrow=narrow)
+        if jit:
+            executor.jit_compile()
         executor.load_data(data_filepath) # This also runs feature engineering
         print(f"Data loaded. {len(executor.data)} patients found.")
         print("Applying rules to all patients...")
         
         results_df = executor.execute()
         
-        print("\n--- Triage Execution Complete ---")
+        # Assemble the report in one buffer and write it to stdout once
+        buf = io.StringIO()
+        buf.write("\n--- Triage Execution Complete ---\n")
         
-        print("\n--- Hospital-Level Alert Status ---")
-        print(f"High Risk Patients: {results_df['High_Risk_Count'].iloc[0]:,} / {results_df['Total_Patients'].iloc[0]:,} ({(results_df['High_Risk_Count'].iloc[0] / results_df['Total_Patients'].iloc[0] * 100):.2f}%)")
-        print(f"Hospital Alert: {results_df['Hospital_Alert'].iloc[0]}")
-        print(f"Alert Level: {results_df['Alert_Level'].iloc[0]}")
+        high_risk = results_df['High_Risk_Count'].iloc[0]
+        total = results_df['Total_Patients'].iloc[0]
+        buf.write("\n--- Hospital-Level Alert Status ---\n")
+        buf.write(f"High Risk Patients: {high_risk:,} / {total:,} ({(high_risk / total * 100):.2f}%)\n")
+        buf.write(f"Hospital Alert: {results_df['Hospital_Alert'].iloc[0]}\n")
+        buf.write(f"Alert Level: {results_df['Alert_Level'].iloc[0]}\n")
         
         # Display the results with all columns properly expanded
         result_columns = [
@@ -97,21 +138,20 @@ def run_interpreter(rule_script, data_filepath):
         # Filter for columns that actually exist in the final dataframe
         display_cols = [col for col in result_columns if col in results_df.columns]
         
-        # Expand pandas display to show all columns without truncation
-        pd.set_option('display.max_columns', None)
-        pd.set_option('display.max_colwidth', None)
-        pd.set_option('display.width', None)
-        pd.set_option('display.max_rows', None)
+        # Expand pandas display to show all columns without truncation,
+        # for this report only rather than for the whole process
+        with pd.option_context('display.max_columns', None, 'display.max_colwidth', None,
+                               'display.width', None, 'display.max_rows', 20):
+            # Show first 10 and last 10 patients
+            buf.write("\n--- Patient Triage Results (Sample) ---\n")
+            buf.write("\nFirst 10 patients:\n")
+            results_df[display_cols].head(10).to_string(buf)
+            buf.write("\n\n...\n")
+            buf.write("\nLast 10 patients:\n")
+            results_df[display_cols].tail(10).to_string(buf)
         
-        # Show first 10 and last 10 patients
-        print("\n--- Patient Triage Results (Sample) ---")
-        print("\nFirst 10 patients:")
-        print(results_df[display_cols].head(10))
-        print("\n...")
-        print("\nLast 10 patients:")
-        print(results_df[display_cols].tail(10))
-
-        print(f"\nSuccessfully processed {len(results_df)} patients.")
+        buf.write(f"\n\nSuccessfully processed {len(results_df)} patients.\n")
+        sys.stdout.write(buf.getvalue())
         
     except TriageError as e:
         print(f"\n--- INTERPRETER FAILED ---")
@@ -0,0 +1,32 @@
+"""
+Data Preparation for the Medical Triage Interpreter
+
+Converts the patient CSV into a Parquet file once, with the column
+types the Executor uses (narrow vital-sign types when TRIAGE_NARROW=1).
+Executor.load_data() reads Parquet files directly, so later runs skip
+CSV parsing and type narrowing. Feature engineering still happens at
+load time.
+
+Usage: python prepare_data.py [input.csv] [output.parquet]
+"""
+
+import sys
+from pathlib import Path
+import pandas as pd
+from executor import read_patient_csv
+from main import CSV_FILEPATH, PARQUET_FILEPATH, NARROW
+
+def prepare_data(csv_path, parquet_path, narrow=NARROW):
+    """
+    Reads 'csv_path' (with narrow dtypes when 'narrow' is set) and writes
+    it to 'parquet_path'.
+    """
+    data = read_patient_csv(csv_path, pd, narrow=narrow)
+    data.to_parquet(parquet_path, compression='zstd', index=False)
+    return data
+
+if __name__ == '__main__':
+    csv_path = Path(sys.argv[1]) if len(sys.argv) > 1 else CSV_FILEPATH
+    parquet_path = Path(sys.argv[2]) if len(sys.argv) > 2 else csv_path.with_suffix('.parquet')
+    data = prepare_data(csv_path, parquet_path)
+    print(f"Wrote {len(data)} rows to '{parquet_path}'.")
@@ -0,0 +1,50 @@
+"""
+Optional build script for the Medical Triage Interpreter.
+
+Compiles the parser (triage_parser.py, typed by triage_parser.pxd) into a
+C extension with Cython:
+
+    python setup.py build_ext --inplace
+
+Alternatively, TRIAGE_MYPYC=1 compiles it with mypyc, which works from
+the type annotations in the module and needs no .pxd:
+
+    TRIAGE_MYPYC=1 python setup.py build_ext --inplace
+
+Python imports the extension ahead of the .py file when it is present.
+Without Cython or mypyc, or with TRIAGE_NO_CYTHON=1 set, nothing is
+compiled and the plain Python modules are used unchanged.
+"""
+
+import os
+from setuptools import setup
+
+try:
+    from Cython.Build import cythonize
+except ImportError:
+    cythonize = None
+
+try:
+    from mypyc.build import mypycify
+except ImportError:
+    mypycify = None
+
+ext_modules = []
+if os.environ.get('TRIAGE_MYPYC'):
+    if mypycify is None:
+        raise SystemExit("TRIAGE_MYPYC is set but mypyc is not installed (pip install mypy)")
+    # Only the parser is compiled; its imports are type checked for
+    # signatures but their own errors are not reported
+    ext_modules = mypycify(['--follow-imports=silent', 'triage_parser.py'])
+elif cythonize is not None and not os.environ.get('TRIAGE_NO_CYTHON'):
+    ext_modules = cythonize(
+        ['triage_parser.py'],
+        # Locals are typed by the .pxd; the annotations are for mypyc
+        compiler_directives={'language_level': 3, 'boundscheck': False, 'wraparound': False,
+                             'annotation_typing': False},
+    )
+
+setup(
+    name='medical-triage-interpreter',
+    ext_modules=ext_modules,
+)
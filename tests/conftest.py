@@ -0,0 +1,53 @@
+"""
+Shared fixtures for the interpreter tests. Tests run against a slice of
+the bundled patient data, so the whole suite stays fast.
+"""
+
+import contextlib
+import io
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from lexer import Lexer
+from triage_parser import Parser
+from executor import Executor
+
+DATA_FILEPATH = ROOT / 'data' / 'human_vital_sign.csv'
+VALID_RULES_FILEPATH = ROOT / 'tests' / 'test_valid_inputs.txt'
+INVALID_RULES_FILEPATH = ROOT / 'tests' / 'text_invalid_inputs.txt'
+
+# Rows of the bundled data the executor tests run on
+SAMPLE_ROWS = 2000
+
+
+@pytest.fixture(scope='session')
+def sample_csv(tmp_path_factory):
+    """The header and first SAMPLE_ROWS patients of the bundled data."""
+    path = tmp_path_factory.mktemp('data') / 'sample.csv'
+    with open(DATA_FILEPATH, encoding='utf-8') as source:
+        lines = [next(source) for _ in range(SAMPLE_ROWS + 1)]
+    path.write_text(''.join(lines), encoding='utf-8')
+    return path
+
+
+def run_script(source, data_filepath, jit=False, **executor_options):
+    """
+    Parses 'source' into a fresh AST (so no compiled conditions are shared
+    between runs), executes it against the data file and returns the
+    result DataFrame and everything the executor printed. With 'jit',
+    conditions run as per-rule Numba kernels.
+    """
+    ast = Parser(Lexer(source).tokenize()).parse()
+    executor = Executor(ast, **executor_options)
+    if jit:
+        executor.jit_compile()
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        executor.load_data(data_filepath)
+        result = executor.execute()
+    return result, output.getvalue()
@@ -0,0 +1,256 @@
+"""
+Tests for the Executor and its column store. The differential tests run
+each script through every evaluation path (plain compiled closures, the
+fused numexpr kernel, the Numba tape kernel and the per-rule Numba
+kernels) and require the same results and warnings from all of them.
+"""
+
+import contextlib
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import executor
+import jit_kernels
+from column_store import ColumnStore, column_can_hold
+from error_handler import LexerError
+from conftest import VALID_RULES_FILEPATH, INVALID_RULES_FILEPATH, run_script
+
+EDGE_SCRIPT = """
+IF 'Age' > 60 THEN
+SET 'Senior' = True
+IF 'Heart Rate' > 90 AND NOT ('Oxygen Saturation' >= 97) THEN
+SET 'Flag' = "A"
+ELSE
+SET 'Flag' = "B"
+
+IF 'Flag' IS NULL OR 'Gender' == "Male" THEN
+SET 'G' = 1
+
+IF 'Systolic Blood Pressure' > 'Heart Rate' AND 'Body Temperature' > 37.2 THEN
+SET 'Warm' = True
+
+IF 'Heart Rate' == 60 OR 'Respiratory Rate' != 16 AND 'Age' IS NOT NULL THEN
+SET 'X' = NULL
+SET 'Y' = 2.5
+
+IF 'Gender' > 5 THEN
+SET 'T' = 1
+
+IF NOT 'Senior' == True OR 'BMI' > 30 AND 'MAP' <= 95.5 THEN
+SET 'Senior' = "maybe"
+SET 'N_maybe' = COUNT WHERE 'Senior' == "maybe" AND 'Gender' IS NOT NULL
+
+IF 'Age' > 0 THEN
+SET 'C1' = COUNT WHERE 'Heart Rate' > 90 OR 'Pulse_Pressure' >= 40
+
+IF 'Heart Rate' > 95 THEN
+SET 'Heart Rate' = 50
+
+IF 'Age' > 0 THEN
+SET 'C2' = COUNT WHERE 'Heart Rate' > 90 OR 'Pulse_Pressure' >= 40
+"""
+
+MODES = ['plain', 'numexpr', 'tape', 'jit']
+
+
+def use_mode(monkeypatch, mode):
+    """Routes compiled conditions through one evaluation path."""
+    if mode in ('numexpr', 'tape'):
+        monkeypatch.setattr(executor, 'FUSED_MIN_ROWS', 1)
+    if mode == 'numexpr' and executor.numexpr is None:
+        pytest.skip('numexpr is not installed')
+    if mode in ('tape', 'jit') and jit_kernels.numba is None:
+        pytest.skip('numba is not installed')
+    if mode != 'numexpr':
+        monkeypatch.setattr(executor, 'numexpr', None)
+    if mode != 'tape':
+        monkeypatch.setattr(jit_kernels, 'evaluate_tape', None)
+    monkeypatch.setattr(jit_kernels, 'JIT_MIN_ROWS', 1)
+
+
+@pytest.fixture(params=['valid', 'edge'])
+def script(request):
+    if request.param == 'valid':
+        return VALID_RULES_FILEPATH.read_text(encoding='utf-8')
+    return EDGE_SCRIPT
+
+
+@pytest.mark.parametrize('narrow', [False, True])
+@pytest.mark.parametrize('mode', MODES[1:])
+def test_evaluation_paths_agree(monkeypatch, sample_csv, script, mode, narrow):
+    expected, expected_output = run_script(script, sample_csv, narrow=narrow)
+    use_mode(monkeypatch, mode)
+    result, output = run_script(script, sample_csv, jit=mode == 'jit', narrow=narrow)
+    pd.testing.assert_frame_equal(result, expected)
+    assert output == expected_output
+
+
+@pytest.mark.parametrize('mode', MODES)
+def test_invalid_script_fails_in_lexer(monkeypatch, sample_csv, mode):
+    use_mode(monkeypatch, mode)
+    with pytest.raises(LexerError):
+        run_script(INVALID_RULES_FILEPATH.read_text(encoding='utf-8'), sample_csv, jit=mode == 'jit')
+
+
+def test_integer_out_of_int16_range_is_not_holdable():
+    values = np.zeros(3, dtype=np.int16)
+    assert column_can_hold(values, 100)
+    assert not column_can_hold(values, 40000)
+    assert not column_can_hold(values, -40000)
+
+
+@pytest.mark.parametrize('value, dtype', [
+    (40000, np.int32),
+    (3_000_000_000, np.int64),
+    (2 ** 70, object),
+])
+def test_out_of_range_set_widens_integer_column(value, dtype):
+    store = ColumnStore(4, [('Heart Rate', np.array([60, 70, 80, 90], dtype=np.int16))])
+    store.assign('Heart Rate', np.array([True, False, True, False]), value)
+    assert store['Heart Rate'].dtype == dtype
+    assert store['Heart Rate'].tolist() == [value, 70, value, 90]
+
+
+def test_out_of_range_set_in_script(sample_csv):
+    result, output = run_script("IF 'Age' > 0 THEN\nSET 'Heart Rate' = 40000\n", sample_csv, narrow=True)
+    assert 'Warning' not in output
+    assert (result['Heart Rate'] == 40000).all()
+
+
+def test_set_and_count_columns_stay_integer(sample_csv):
+    result, _ = run_script(
+        "IF 'Age' > 0 THEN\n"
+        "SET 'Alert_Level' = 0\n"
+        "SET 'Total' = COUNT WHERE 'Age' > 50\n", sample_csv)
+    assert result['Alert_Level'].dtype == np.int64
+    assert result['Total'].dtype == np.int64
+
+
+def test_partial_integer_sets_are_integer_once_every_row_is_set(sample_csv):
+    result, _ = run_script(
+        "IF 'Age' > 50 THEN\n"
+        "SET 'X' = 1\n"
+        "SET 'Y' = 1\n\n"
+        "IF 'Age' <= 50 THEN\n"
+        "SET 'X' = 2\n\n"
+        "IF 'Age' <= 30 THEN\n"
+        "SET 'Y' = 2\n", sample_csv)
+    assert result['X'].dtype == np.int64
+    assert set(result['X']) == {1, 2}
+    # Rows between 30 and 50 never set 'Y', so it keeps its NULLs
+    assert result['Y'].dtype == np.float64
+    assert result['Y'].isna().any()
+
+
+def test_mismatched_comparison_is_false_for_every_row(sample_csv):
+    result, output = run_script(
+        "IF 'Heart Rate' >= \"a\" OR 'Q' IS NULL THEN\n"
+        "SET 'A' = 1\n"
+        "ELSE\n"
+        "SET 'A' = 2\n\n"
+        "IF 'P' > 60 AND 'Heart Rate' <= \"a\" THEN\n"
+        "SET 'B' = 1\n"
+        "ELSE\n"
+        "SET 'B' = 2\n\n"
+        "IF 'Heart Rate' > 0 THEN\n"
+        "SET 'C' = 5\n"
+        "SET 'V' = COUNT WHERE 'Gender' < 3\n"
+        "SET 'D' = 6\n", sample_csv)
+    # The other operands and the ELSE branch still run
+    assert (result['A'] == 1).all()
+    assert (result['B'] == 2).all()
+    # A COUNT over a mismatch is 0, and the rule's later actions still run
+    assert (result['V'] == 0).all()
+    assert (result['C'] == 5).all() and (result['D'] == 6).all()
+    assert "comparison on 'Gender'" in output
+    assert 'Skipping' not in output
+
+
+def test_integer_set_after_read_stays_integer(sample_csv):
+    result, _ = run_script(
+        "IF 'X' IS NULL THEN\n"
+        "SET 'X' = 0\n\n"
+        "IF NOT ('R' == 1) THEN\n"
+        "SET 'R' = 1\n\n"
+        "IF 'Age' > 50 THEN\n"
+        "SET 'M' = 1\n\n"
+        "IF 'Age' <= 50 THEN\n"
+        "SET 'M' = \"young\"\n", sample_csv)
+    assert result['X'].dtype == np.int64
+    assert result['R'].dtype == np.int64
+    # Integers next to strings keep their type
+    assert set(map(type, result['M'])) == {int, str}
+
+
+def test_jit_kernels_stay_with_their_executor(monkeypatch, sample_csv):
+    if jit_kernels.numba is None:
+        pytest.skip('numba is not installed')
+    monkeypatch.setattr(jit_kernels, 'JIT_MIN_ROWS', 1)
+    calls = []
+    kernel_for = jit_kernels.kernel_for
+    monkeypatch.setattr(jit_kernels, 'kernel_for', lambda source: calls.append(source) or kernel_for(source))
+    
+    # Both executors share the cached AST of the script
+    ast = executor.compile_script(EDGE_SCRIPT)
+    results = []
+    for jit in (True, False):
+        calls.clear()
+        script_executor = executor.Executor(ast)
+        if jit:
+            script_executor.jit_compile()
+        with contextlib.redirect_stdout(io.StringIO()):
+            script_executor.load_data(sample_csv)
+            results.append(script_executor.execute())
+        assert bool(calls) == jit
+    pd.testing.assert_frame_equal(results[0], results[1])
+
+
+def test_columns_read_by_a_short_circuited_operand_exist(sample_csv):
+    result, _ = run_script(
+        "IF 'P' > 5 AND 'Age' IS NULL THEN\n"
+        "SET 'A' = 1\n\n"
+        "IF 'Age' > 0 THEN\n"
+        "SET 'N' = COUNT WHERE 'P2' > 5 AND 'Age' IS NULL\n", sample_csv)
+    # 'Age' IS NULL runs first and selects no rows, which skips the
+    # comparison; its column still exists, as in the written order
+    for name in ('P', 'P2'):
+        assert result[name].isna().all()
+
+
+def test_count_is_recomputed_after_its_column_is_set(sample_csv):
+    result, _ = run_script(
+        "IF 'Heart Rate' IS NOT NULL THEN\n"
+        "SET 'C1' = COUNT WHERE 'Heart Rate' > 90\n\n"
+        "IF 'Heart Rate' > 95 THEN\n"
+        "SET 'Heart Rate' = 50\n\n"
+        "IF 'Heart Rate' IS NOT NULL THEN\n"
+        "SET 'C2' = COUNT WHERE 'Heart Rate' > 90\n", sample_csv)
+    heart_rate = pd.read_csv(sample_csv)['Heart Rate']
+    assert (result['C1'] == (heart_rate > 90).sum()).all()
+    assert (result['C2'] == ((heart_rate > 90) & (heart_rate <= 95)).sum()).all()
+
+
+def test_shared_condition_mask_follows_writes(sample_csv):
+    result, _ = run_script(
+        "IF 'Heart Rate' > 90 THEN\n"
+        "SET 'A' = 1\n\n"
+        "IF 'Heart Rate' > 95 THEN\n"
+        "SET 'Heart Rate' = 50\n\n"
+        "IF 'Heart Rate' > 90 THEN\n"
+        "SET 'B' = 1\n", sample_csv)
+    heart_rate = pd.read_csv(sample_csv)['Heart Rate']
+    assert (result['A'].notna() == (heart_rate > 90)).all()
+    assert (result['B'].notna() == (result['Heart Rate'] > 90)).all()
+    assert result['B'].notna().sum() < result['A'].notna().sum()
+
+
+@pytest.mark.parametrize('nrows', [1, 8, 13])
+def test_packed_masks_round_trip(nrows):
+    store = ColumnStore(nrows)
+    mask = np.random.default_rng(nrows).random(nrows) > 0.5
+    packed = store.pack_mask(mask)
+    assert packed.nbytes == (nrows + 7) // 8
+    assert (store.unpack_mask(packed) == mask).all()
@@ -0,0 +1,72 @@
+"""
+Differential tests for the Lexer: the regex scan in tokenize(), the
+character-at-a-time scan in tokenize_by_character() and repeated
+get_next_token() calls must agree on every token and every error.
+"""
+
+import pytest
+
+from lexer import Lexer, TokenType
+from error_handler import LexerError
+from conftest import VALID_RULES_FILEPATH, INVALID_RULES_FILEPATH
+
+SNIPPETS = [
+    "",
+    "\n\n",
+    "IF 'Age' >= 65 THEN\nSET 'Senior' = True\n",
+    "if 'Heart Rate' != 60.5 and not 'Risk' is null then\nset 'X' = false",
+    "SET 'Note' = \"two\nlines\"\nSET 'Y' = 3",
+    "IF 'Age' > 1.2.3 THEN",
+    "IF 'Age' ! 5",
+    "SET 'Name' = \"unterminated",
+    "IF 'Age' > 5 @",
+    "IF 'Âge' > 5 # comment é\n",
+]
+
+
+def incremental(lexer):
+    tokens = [lexer.get_next_token()]
+    while tokens[-1].type != TokenType.EOF:
+        tokens.append(lexer.get_next_token())
+    return tokens
+
+
+SCANS = {
+    'tokenize': lambda lexer: lexer.tokenize(),
+    'tokenize_by_character': lambda lexer: lexer.tokenize_by_character(),
+    'get_next_token': incremental,
+}
+
+
+def scan(source, method):
+    """Returns every token field, or the error the scan raised."""
+    try:
+        tokens = SCANS[method](Lexer(source))
+    except LexerError as e:
+        return ('error', str(e))
+    return [(token.type, token.value, type(token.value), token.line, token.col) for token in tokens]
+
+
+@pytest.fixture(params=['valid', 'invalid'] + list(range(len(SNIPPETS))))
+def source(request):
+    if request.param == 'valid':
+        return VALID_RULES_FILEPATH.read_text(encoding='utf-8')
+    if request.param == 'invalid':
+        return INVALID_RULES_FILEPATH.read_text(encoding='utf-8')
+    return SNIPPETS[request.param]
+
+
+@pytest.mark.parametrize('method', ['tokenize_by_character', 'get_next_token'])
+def test_scans_agree(source, method):
+    assert scan(source, method) == scan(source, 'tokenize')
+
+
+def test_valid_script_tokenizes():
+    tokens = Lexer(VALID_RULES_FILEPATH.read_text(encoding='utf-8')).tokenize()
+    assert tokens[-1].type == TokenType.EOF
+    assert TokenType.COUNT in {token.type for token in tokens}
+
+
+def test_invalid_script_fails_on_unquoted_column():
+    with pytest.raises(LexerError, match='Heart'):
+        Lexer(INVALID_RULES_FILEPATH.read_text(encoding='utf-8')).tokenize()
@@ -0,0 +1,40 @@
+"""Tests for the entry point's file handling."""
+
+import os
+
+from main import data_filepath, read_file_content
+
+
+def test_parquet_copy_is_used_when_up_to_date(tmp_path):
+    csv_path, parquet_path = tmp_path / 'data.csv', tmp_path / 'data.parquet'
+    csv_path.write_text('a\n1\n')
+    parquet_path.write_bytes(b'')
+    os.utime(csv_path, (1000, 1000))
+    os.utime(parquet_path, (2000, 2000))
+    assert data_filepath(csv_path, parquet_path) == parquet_path
+
+
+def test_csv_newer_than_parquet_copy_wins(tmp_path):
+    csv_path, parquet_path = tmp_path / 'data.csv', tmp_path / 'data.parquet'
+    csv_path.write_text('a\n1\n')
+    parquet_path.write_bytes(b'')
+    os.utime(parquet_path, (1000, 1000))
+    os.utime(csv_path, (2000, 2000))
+    assert data_filepath(csv_path, parquet_path) == csv_path
+
+
+def test_csv_is_used_without_parquet_copy(tmp_path):
+    csv_path = tmp_path / 'data.csv'
+    assert data_filepath(csv_path, tmp_path / 'data.parquet') == csv_path
+
+
+def test_read_file_content_normalizes_line_endings(tmp_path):
+    path = tmp_path / 'rules.txt'
+    path.write_bytes("IF 'Âge' > 1 THEN\r\nSET 'X' = 1\rSET 'Y' = 2\n".encode('utf-8'))
+    assert read_file_content(path) == "IF 'Âge' > 1 THEN\nSET 'X' = 1\nSET 'Y' = 2\n"
+
+
+def test_read_file_content_of_empty_file(tmp_path):
+    path = tmp_path / 'empty.txt'
+    path.write_bytes(b'')
+    assert read_file_content(path) == ''
@@ -0,0 +1,91 @@
+"""
+Differential tests for the Parser: the AST must not depend on which
+Lexer scan produced the tokens, or on spacing and comments, and
+parse_tokens() must return the cached tree for a repeated token stream.
+"""
+
+import pytest
+
+from lexer import Lexer, Token
+from triage_parser import ASTNode, Parser, parse_tokens
+from error_handler import ParserError
+from executor import compile_script
+from conftest import VALID_RULES_FILEPATH
+
+NESTED_SCRIPT = """
+IF 'Age' > 60 AND NOT ('Oxygen Saturation' >= 97 OR 'Risk' IS NULL) THEN
+SET 'Senior' = True
+IF 'Heart Rate' > 100 THEN
+SET 'Flag' = "A"
+ELSE
+SET 'Flag' = NULL
+
+IF 'Risk' IS NOT NULL THEN
+SET 'N' = COUNT WHERE 'Risk' == "High Risk" AND 'Age' <= 30
+"""
+
+
+def dump(node):
+    """
+    Returns the structure of an AST as nested tuples, leaving out token
+    positions and the caches the Parser and Executor keep on nodes.
+    """
+    if isinstance(node, list):
+        return [dump(item) for item in node]
+    if isinstance(node, Token):
+        return (node.type, node.value, type(node.value))
+    if not isinstance(node, ASTNode):
+        return node
+    fields = []
+    for cls in type(node).__mro__:
+        for name in getattr(cls, '__slots__', ()):
+            if not name.startswith('_') and name not in ('names', 'name_id') and hasattr(node, name):
+                fields.append((name, dump(getattr(node, name))))
+    return (type(node).__name__, tuple(sorted(fields)))
+
+
+def respaced(source):
+    """Adds spaces and a comment to every line, keeping the line breaks."""
+    return '\n'.join(f"  {line}   # note" if line.strip() else line for line in source.split('\n'))
+
+
+@pytest.fixture(params=['valid', 'nested'])
+def source(request):
+    if request.param == 'valid':
+        return VALID_RULES_FILEPATH.read_text(encoding='utf-8')
+    return NESTED_SCRIPT
+
+
+def test_ast_does_not_depend_on_lexer_scan(source):
+    expected = dump(Parser(Lexer(source).tokenize()).parse())
+    assert dump(Parser(Lexer(source).tokenize_by_character()).parse()) == expected
+
+
+def test_ast_ignores_spacing_and_comments(source):
+    expected = dump(Parser(Lexer(source).tokenize()).parse())
+    assert dump(Parser(Lexer(respaced(source)).tokenize()).parse()) == expected
+
+
+def test_parse_tokens_matches_parser(source):
+    expected = dump(Parser(Lexer(source).tokenize()).parse())
+    assert dump(parse_tokens(Lexer(source).tokenize())) == expected
+
+
+def test_parse_tokens_reuses_ast(source):
+    ast = parse_tokens(Lexer(source).tokenize())
+    assert parse_tokens(Lexer(source).tokenize()) is ast
+    assert parse_tokens(Lexer(respaced(source)).tokenize()) is ast
+    assert parse_tokens(Lexer(source.replace('"', '"x', 1)).tokenize()) is not ast
+
+
+def test_parse_tokens_does_not_cache_errors():
+    tokens = Lexer("IF 'Age' > THEN\nSET 'X' = 1").tokenize()
+    for _ in range(2):
+        with pytest.raises(ParserError):
+            parse_tokens(tokens)
+
+
+def test_compile_script_reuses_ast(source):
+    ast = compile_script(source)
+    assert compile_script(source) is ast
+    assert compile_script(respaced(source)) is ast
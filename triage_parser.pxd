@@ -0,0 +1,31 @@
+# Cython declarations for triage_parser.py, which setup.py compiles in
+# pure Python mode. The .py module stays importable without them.
+
+cimport cython
+
+cdef class Parser:
+    cdef public list tokens
+    cdef public Py_ssize_t pos
+    cdef public list newline_run
+    cdef public dict names
+    cdef public dict _node_cache
+
+    cpdef identifier(self, token)
+    cpdef value(self, token)
+    cpdef advance(self)
+    cpdef Py_ssize_t skip_newlines(self)
+    @cython.locals(token=object)
+    cpdef consume(self, expected_token_type)
+    @cython.locals(tokens=list)
+    cpdef parse(self)
+    @cython.locals(tokens=list, token=object, blank_line_after_set=bint, blank_line_after_if=bint)
+    cpdef parse_rule(self, bint is_nested=*)
+    @cython.locals(tokens=list, pos=Py_ssize_t, token=object, identifier_token=object, identifier_node=object, value_node=object)
+    cpdef parse_action(self)
+    cpdef parse_count(self)
+    @cython.locals(tokens=list, pos=Py_ssize_t, stack=list, token=object, node=object, left=object,
+                   op_token=object, not_token=object, outer_left=object, outer_op_token=object, outer_not_token=object)
+    cpdef parse_condition(self)
+    @cython.locals(tokens=list, pos=Py_ssize_t, token=object, identifier_node=object, op_token=object, right_node=object,
+                   node=object, key=tuple, is_not=bint)
+    cpdef parse_atom(self)
@@ -8,24 +8,62 @@ represents the grammar and logic of the rule script.
 Supports new keywords: COUNT (for counting high-risk patients) and ELSE.
 """
 
-from lexer import TokenType
+import sys
+from collections import OrderedDict
+from typing import Any, ClassVar, Dict, List, Optional
+from lexer import Token, TokenType
 from error_handler import ParserError
 
 ###############################################################################
 # AST (Abstract Syntax Tree) Node Classes
 ###############################################################################
 
+# Every node class declares __slots__, which drops the per-instance
+# __dict__: a script produces thousands of nodes. Slots starting with '_'
+# hold what the Executor caches on nodes once per AST (plans, compiled
+# closures, column indices); they stay unset until it fills them, and are
+# declared as bare annotations so a mypyc build knows the attributes.
+#
+# Each class also carries a small integer 'kind', so consumers can
+# dispatch with one integer compare or a table index instead of walking
+# the class hierarchy with isinstance().
+
+KIND_NODE = 0
+KIND_RULE_SCRIPT = 1
+KIND_RULE = 2
+KIND_SET_ACTION = 3
+KIND_BINARY_OP = 4
+KIND_UNARY_OP = 5
+KIND_COMPARISON = 6
+KIND_IS_NULL = 7
+KIND_COUNT = 8
+KIND_VALUE = 9
+KIND_IDENTIFIER = 10
+NODE_KINDS = 11  # Size of a table indexed by kind
+
 class ASTNode:
     """Base class for all AST nodes."""
-    pass
+    kind: ClassVar[int] = KIND_NODE
+    __slots__ = ()
 
 class RuleScriptNode(ASTNode):
     """Represents the entire script, containing a list of rules."""
-    def __init__(self, rules):
+    kind = KIND_RULE_SCRIPT
+    __slots__ = ('rules', 'names')
+    
+    def __init__(self, rules, names=None):
         self.rules = rules # List of RuleNode objects
+        self.names = names if names is not None else [] # Column names, indexed by IdentifierNode.name_id
 
 class RuleNode(ASTNode):
     """Represents a single 'IF ... THEN ... (ELSE ...)' rule."""
+    kind = KIND_RULE
+    __slots__ = ('condition', 'then_actions', 'else_actions',
+                 '_planned', '_columns', '_compiled_condition')
+    _planned: bool
+    _columns: Any
+    _compiled_condition: Any
+    
     def __init__(self, condition, then_actions, else_actions=None):
         self.condition = condition # A condition node
         self.then_actions = then_actions     # A list of action nodes (SetActionNode or nested RuleNode)
@@ -33,12 +71,19 @@ class RuleNode(ASTNode):
 
 class SetActionNode(ASTNode):
     """Represents a 'SET variable = value' action."""
+    kind = KIND_SET_ACTION
+    __slots__ = ('identifier', 'value_node')
+    
     def __init__(self, identifier, value_node):
         self.identifier = identifier # The new/updated column name (e.g., 'Risk')
         self.value_node = value_node # A ValueNode (String, Number, etc.) or CountNode
 
 class BinaryOpNode(ASTNode):
     """Represents a binary operation (e.g., AND, OR)."""
+    kind = KIND_BINARY_OP
+    __slots__ = ('left', 'op_token', 'right', '_hash')
+    _hash: Any
+    
     def __init__(self, left, op_token, right):
         self.left = left
         self.op_token = op_token
@@ -46,12 +91,20 @@ class BinaryOpNode(ASTNode):
 
 class UnaryOpNode(ASTNode):
     """Represents a unary operation (e.g., NOT)."""
+    kind = KIND_UNARY_OP
+    __slots__ = ('op_token', 'operand', '_hash')
+    _hash: Any
+    
     def __init__(self, op_token, operand):
         self.op_token = op_token
         self.operand = operand
 
 class ComparisonNode(ASTNode):
     """Represents a comparison (e.g., 'Heart Rate' > 100)."""
+    kind = KIND_COMPARISON
+    __slots__ = ('left_identifier', 'op_token', 'right_value', '_hash')
+    _hash: Any
+    
     def __init__(self, left_identifier, op_token, right_value):
         self.left_identifier = left_identifier
         self.op_token = op_token
@@ -59,91 +112,183 @@ class ComparisonNode(ASTNode):
 
 class IsNullNode(ASTNode):
     """Represents a check for NULL (e.g., 'Blood Pressure' IS NULL)."""
+    kind = KIND_IS_NULL
+    __slots__ = ('identifier', 'is_not', '_hash')
+    _hash: Any
+    
     def __init__(self, identifier, is_not):
         self.identifier = identifier
         self.is_not = is_not # Boolean, True if "IS NOT NULL"
 
 class CountNode(ASTNode):
     """Represents a COUNT function (e.g., COUNT WHERE 'Risk' == "High Risk")."""
+    kind = KIND_COUNT
+    __slots__ = ('condition', '_planned', '_columns', '_compiled_condition',
+                 '_condition_key', '_condition_reads')
+    _planned: bool
+    _columns: Any
+    _compiled_condition: Any
+    _condition_key: Any
+    _condition_reads: Any
+    
     def __init__(self, condition):
         self.condition = condition # The condition to count matching rows
 
 class ValueNode(ASTNode):
     """Represents a literal value (String, Number, Boolean, Null)."""
+    kind = KIND_VALUE
+    __slots__ = ('token', 'value')
+    
     def __init__(self, token):
         self.token = token
         self.value = token.value
 
 class IdentifierNode(ASTNode):
-    """Represents an identifier (e.g., a column name)."""
-    def __init__(self, token):
+    """
+    Represents an identifier (e.g., a column name). The name is interned,
+    so every node naming the same column holds the same string object and
+    dictionary lookups by name match on identity.
+    """
+    kind = KIND_IDENTIFIER
+    __slots__ = ('token', 'name', 'name_id', '_col_idx')
+    _col_idx: int
+    
+    def __init__(self, token, name_id=None):
         self.token = token
-        self.name = token.value
+        self.name = sys.intern(token.value)
+        self.name_id = name_id # Index of the name in RuleScriptNode.names
 
 ###############################################################################
 # Parser Class
 ###############################################################################
 
+def token_mask(*token_types: TokenType) -> int:
+    """
+    Returns a bit mask with one bit set per TokenType. TokenType values are
+    small ints, so '(1 << token.type) & mask' tests membership with plain
+    integer operations.
+    """
+    mask = 0
+    for token_type in token_types:
+        mask |= 1 << token_type
+    return mask
+
+# Tokens that may start an action inside THEN/ELSE
+ACTION_START = token_mask(TokenType.SET, TokenType.IF)
+# Operators joining conditions
+LOGICAL_OPERATORS = token_mask(TokenType.AND, TokenType.OR)
+# Comparison operators
+COMPARISON_OPERATORS = token_mask(TokenType.GT, TokenType.LT, TokenType.GTE, TokenType.LTE, TokenType.EQ, TokenType.NEQ)
+# Literals a SET action can assign
+ASSIGNABLE_VALUES = token_mask(TokenType.STRING, TokenType.NUMBER, TokenType.BOOLEAN, TokenType.NULL)
+# Right-hand sides of a comparison: a literal or another column
+COMPARABLE_VALUES = token_mask(TokenType.NUMBER, TokenType.STRING, TokenType.BOOLEAN, TokenType.IDENTIFIER)
+
+def unexpected_token(expected_token_type: TokenType, token: Token) -> ParserError:
+    """Builds the error for finding 'token' where another type was required."""
+    return ParserError(f"Expected {expected_token_type.name} but got {token.type.name}", token.line, token.col)
+
 class Parser:
     """
     Parses a list of tokens into an Abstract Syntax Tree (AST).
     This is a recursive descent parser.
     """
-    def __init__(self, tokens):
+    def __init__(self, tokens: List[Token]) -> None:
         self.tokens = tokens
         self.pos = 0
         if not self.tokens:
              raise ParserError("Received empty token list.", 1, 1)
-        self.current_token = self.tokens[self.pos]
+        # newline_run[i] is the number of consecutive NEWLINE tokens
+        # starting at index i, so a run is skipped in one step
+        newline_run: List[int] = [0] * (len(tokens) + 1)
+        for i in range(len(tokens) - 1, -1, -1):
+            if tokens[i].type == TokenType.NEWLINE:
+                newline_run[i] = newline_run[i + 1] + 1
+        self.newline_run = newline_run
+        # Column name -> name_id of the IdentifierNodes built so far
+        self.names: Dict[str, int] = {}
+        # Leaf nodes already built, so a clause repeated across rules is
+        # one shared node. Keys: the column name for an IdentifierNode,
+        # (type, value type, value) for a ValueNode, (name, is_not) for an
+        # IsNullNode and (name, operator, right type, value type, value)
+        # for a ComparisonNode. The value type keeps 1, 1.0 and True apart.
+        self._node_cache: Dict[Any, Any] = {}
+
+    def identifier(self, token: Token) -> IdentifierNode:
+        """
+        Returns the IdentifierNode for a column name, numbering each
+        distinct name in order of first use.
+        """
+        node = self._node_cache.get(token.value)
+        if node is None:
+            names = self.names
+            node = self._node_cache[token.value] = IdentifierNode(token, len(names))
+            names[token.value] = node.name_id
+        return node
+
+    def value(self, token: Token) -> ValueNode:
+        """Returns the ValueNode for a literal token."""
+        key = (token.type, type(token.value), token.value)
+        node = self._node_cache.get(key)
+        if node is None:
+            node = self._node_cache[key] = ValueNode(token)
+        return node
+
+    # The position is the only parser state: the current token is always
+    # self.tokens[self.pos], read into a local where it is needed instead
+    # of being kept in sync on every advance.
 
-    def advance(self):
+    @property
+    def current_token(self) -> Optional[Token]:
+        """The token at the current position, or None past the end."""
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def advance(self) -> None:
         """Move to the next token."""
         self.pos += 1
-        if self.pos < len(self.tokens):
-            self.current_token = self.tokens[self.pos]
-        else:
-            # This condition should not be met if EOF is handled properly
-            self.current_token = None 
 
-    def consume(self, expected_token_type):
+    def skip_newlines(self) -> int:
+        """Skip a run of NEWLINE tokens and return how many there were."""
+        count = self.newline_run[self.pos]
+        self.pos += count
+        return count
+
+    def consume(self, expected_token_type: TokenType) -> Token:
         """
         Consume the current token if it matches the expected type,
         otherwise raise a ParserError.
         """
-        if self.current_token.type == expected_token_type:
-            token = self.current_token
-            self.advance()
+        token = self.tokens[self.pos]
+        if token.type == expected_token_type:
+            self.pos += 1
             return token
         else:
-            raise ParserError(
-                f"Expected {expected_token_type.name} but got {self.current_token.type.name}",
-                self.current_token.line, self.current_token.col
-            )
+            raise unexpected_token(expected_token_type, token)
 
-    def parse(self):
+    def parse(self) -> RuleScriptNode:
         """Main entry point. Parses the entire script."""
+        tokens = self.tokens
         rules = []
         # Skip leading newlines
-        while self.current_token.type == TokenType.NEWLINE:
-            self.advance()
+        self.skip_newlines()
         
-        while self.current_token.type != TokenType.EOF:
+        while tokens[self.pos].type != TokenType.EOF:
             rules.append(self.parse_rule(is_nested=False))
             # Skip any newlines between rules
-            while self.current_token.type == TokenType.NEWLINE:
-                self.advance()
+            self.skip_newlines()
         
         if not rules:
             raise ParserError("Empty rule script. Expected one or more 'IF' rules.", 1, 1)
             
-        return RuleScriptNode(rules)
+        return RuleScriptNode(rules, list(self.names))
 
-    def parse_rule(self, is_nested=False):
+    def parse_rule(self, is_nested: bool = False) -> RuleNode:
         """
         Parses a single 'IF ... THEN ... (ELSE ...)' rule.
         If is_nested=True, this is a nested IF inside a THEN/ELSE block.
         If is_nested=False, this is a top-level rule and should NOT consume IFs after blank lines.
         """
+        tokens = self.tokens
         self.consume(TokenType.IF)
         
         condition = self.parse_condition()
@@ -151,117 +296,109 @@ class Parser:
         self.consume(TokenType.THEN)
         
         # Skip newlines after THEN
-        while self.current_token.type == TokenType.NEWLINE:
-            self.advance()
+        self.skip_newlines()
+        token = tokens[self.pos]
         
         # Parse THEN actions (can include nested IFs or SETs)
         # For top-level rules, stop if we see IF after a blank line
-        then_actions = []
-        while self.current_token.type in (TokenType.SET, TokenType.IF):
-            if self.current_token.type == TokenType.SET:
+        then_actions: List[ASTNode] = []
+        while (1 << token.type) & ACTION_START:
+            if token.type == TokenType.SET:
                 then_actions.append(self.parse_action())
                 # Track if there's a blank line after this SET
-                blank_line_after_set = False
-                newline_count = 0
-                while self.current_token.type == TokenType.NEWLINE:
-                    newline_count += 1
-                    self.advance()
-                # If there were multiple newlines (blank line), mark it
-                if newline_count > 1:
-                    blank_line_after_set = True
+                blank_line_after_set = self.skip_newlines() > 1
+                token = tokens[self.pos]
                 
                 # If this is a top-level rule and we see IF after blank line, stop parsing THEN
-                if not is_nested and blank_line_after_set and self.current_token.type == TokenType.IF:
+                if not is_nested and blank_line_after_set and token.type == TokenType.IF:
                     break
-            elif self.current_token.type == TokenType.IF:
+            elif token.type == TokenType.IF:
                 # Nested IF statement - always parse as nested
                 then_actions.append(self.parse_rule(is_nested=True))
                 # Skip newlines after nested IF
-                blank_line_after_if = False
-                newline_count = 0
-                while self.current_token.type == TokenType.NEWLINE:
-                    newline_count += 1
-                    self.advance()
-                if newline_count > 1:
-                    blank_line_after_if = True
+                blank_line_after_if = self.skip_newlines() > 1
+                token = tokens[self.pos]
                 
                 # If this is a top-level rule and we see IF after blank line, stop parsing THEN
-                if not is_nested and blank_line_after_if and self.current_token.type == TokenType.IF:
+                if not is_nested and blank_line_after_if and token.type == TokenType.IF:
                     break
             
         if not then_actions:
             raise ParserError("Expected at least one action (SET or nested IF) after 'THEN'",
-                              self.current_token.line, self.current_token.col)
+                              token.line, token.col)
         
         # Parse optional ELSE clause
-        else_actions = None
-        if self.current_token.type == TokenType.ELSE:
+        else_actions: Optional[List[ASTNode]] = None
+        if token.type == TokenType.ELSE:
             self.advance()
             # Skip newlines after ELSE
-            while self.current_token.type == TokenType.NEWLINE:
-                self.advance()
+            self.skip_newlines()
+            token = tokens[self.pos]
             
             else_actions = []
-            while self.current_token.type in (TokenType.SET, TokenType.IF):
-                if self.current_token.type == TokenType.SET:
+            while (1 << token.type) & ACTION_START:
+                if token.type == TokenType.SET:
                     else_actions.append(self.parse_action())
                     # Skip newlines after SET
-                    blank_line_after_set = False
-                    newline_count = 0
-                    while self.current_token.type == TokenType.NEWLINE:
-                        newline_count += 1
-                        self.advance()
-                    if newline_count > 1:
-                        blank_line_after_set = True
+                    blank_line_after_set = self.skip_newlines() > 1
+                    token = tokens[self.pos]
                     # Stop if we hit blank line + next rule in top-level ELSE
-                    if not is_nested and blank_line_after_set and self.current_token.type == TokenType.IF:
+                    if not is_nested and blank_line_after_set and token.type == TokenType.IF:
                         break
-                elif self.current_token.type == TokenType.IF:
+                elif token.type == TokenType.IF:
                     # Nested IF in ELSE
                     else_actions.append(self.parse_rule(is_nested=True))
                     # Skip newlines after nested IF
-                    blank_line_after_if = False
-                    newline_count = 0
-                    while self.current_token.type == TokenType.NEWLINE:
-                        newline_count += 1
-                        self.advance()
-                    if newline_count > 1:
-                        blank_line_after_if = True
+                    blank_line_after_if = self.skip_newlines() > 1
+                    token = tokens[self.pos]
                     # Stop if we hit blank line + next rule
-                    if not is_nested and blank_line_after_if and self.current_token.type == TokenType.IF:
+                    if not is_nested and blank_line_after_if and token.type == TokenType.IF:
                         break
             
             if not else_actions:
                 raise ParserError("Expected at least one action (SET or nested IF) after 'ELSE'",
-                                  self.current_token.line, self.current_token.col)
+                                  token.line, token.col)
                               
         return RuleNode(condition=condition, then_actions=then_actions, else_actions=else_actions)
 
-    def parse_action(self):
+    def parse_action(self) -> SetActionNode:
         """Parses a 'SET IDENTIFIER = value' action."""
-        self.consume(TokenType.SET)
+        # consume() and advance() are inlined here: the position lives in
+        # a local and is written back once the action is parsed
+        tokens = self.tokens
+        pos = self.pos
+        token = tokens[pos]
+        if token.type != TokenType.SET:
+            raise unexpected_token(TokenType.SET, token)
         
-        identifier_token = self.consume(TokenType.IDENTIFIER)
+        identifier_token = tokens[pos + 1]
+        if identifier_token.type != TokenType.IDENTIFIER:
+            raise unexpected_token(TokenType.IDENTIFIER, identifier_token)
         # We use an IdentifierNode to store the *name* of the column we are setting
-        identifier_node = IdentifierNode(identifier_token) 
+        identifier_node = self.identifier(identifier_token)
+        value_node: ASTNode
         
-        self.consume(TokenType.ASSIGN)
+        token = tokens[pos + 2]
+        if token.type != TokenType.ASSIGN:
+            raise unexpected_token(TokenType.ASSIGN, token)
+        pos += 3
+        token = tokens[pos]
         
         # Check if value is a COUNT function
-        if self.current_token.type == TokenType.COUNT:
+        if token.type == TokenType.COUNT:
+            self.pos = pos
             value_node = self.parse_count()
             return SetActionNode(identifier_node, value_node)
         
-        value_token_types = (TokenType.STRING, TokenType.NUMBER, TokenType.BOOLEAN, TokenType.NULL)
-        if self.current_token.type in value_token_types:
-            value_node = ValueNode(self.current_token)
-            self.advance()
+        if (1 << token.type) & ASSIGNABLE_VALUES:
+            value_node = self.value(token)
+            self.pos = pos + 1
             return SetActionNode(identifier_node, value_node)
         else:
-            raise ParserError(f"Expected a value (String, Number, Boolean, Null, or COUNT) but got {self.current_token.type.name}",
-                              self.current_token.line, self.current_token.col)
+            raise ParserError(f"Expected a value (String, Number, Boolean, Null, or COUNT) but got {token.type.name}",
+                              token.line, token.col)
 
-    def parse_count(self):
+    def parse_count(self) -> CountNode:
         """Parses a COUNT WHERE condition function."""
         self.consume(TokenType.COUNT)
         self.consume(TokenType.WHERE)
@@ -270,80 +407,157 @@ class Parser:
         
         return CountNode(condition)
 
-    def parse_condition(self):
-        """Parses a condition, which can have AND/OR logic."""
-        node = self.parse_expression()
+    def parse_condition(self) -> ASTNode:
+        """
+        Parses a condition, which can have AND/OR logic, 'NOT' prefixes and
+        parentheses. AND and OR share one precedence level and associate to
+        the left, so the condition is folded in a single loop; each open
+        parenthesis pushes the partial condition outside it onto a stack
+        instead of recursing.
+        """
+        tokens = self.tokens
+        pos = self.pos
+        # One (left, op_token, not_token) frame per open parenthesis
+        stack: List[Any] = []
+        left: Optional[ASTNode] = None  # The condition folded so far
+        op_token: Optional[Token] = None  # AND/OR waiting for its right operand
         
-        while self.current_token.type in (TokenType.AND, TokenType.OR):
-            op_token = self.current_token
-            self.advance()
-            right = self.parse_expression()
-            node = BinaryOpNode(left=node, op_token=op_token, right=right)
+        while True:
+            # An operand: an optional 'NOT', then an atom or a parenthesis
+            token = tokens[pos]
+            not_token = None
+            if token.type == TokenType.NOT:
+                not_token = token
+                pos += 1
+                token = tokens[pos]
+            if token.type == TokenType.LPAREN:
+                stack.append((left, op_token, not_token))
+                left = op_token = None
+                pos += 1
+                continue
             
-        return node
-
-    def parse_expression(self):
-        """Parses an expression, which can have a 'NOT' prefix."""
-        op_token = None
-        if self.current_token.type == TokenType.NOT:
-            op_token = self.current_token
-            self.advance()
+            self.pos = pos
+            node = self.parse_atom()
+            pos = self.pos
+            if not_token is not None:
+                node = UnaryOpNode(op_token=not_token, operand=node)
+            if op_token is not None:
+                node = BinaryOpNode(left=left, op_token=op_token, right=node)
+            left = node
             
-        node = self.parse_atom()
-        
-        if op_token:
-            return UnaryOpNode(op_token=op_token, operand=node)
-        return node
+            # Close any parentheses that end here, then look for AND/OR
+            token = tokens[pos]
+            while not (1 << token.type) & LOGICAL_OPERATORS:
+                if not stack:
+                    self.pos = pos
+                    return left
+                if token.type != TokenType.RPAREN:
+                    raise unexpected_token(TokenType.RPAREN, token)
+                outer_left, outer_op_token, outer_not_token = stack.pop()
+                node = left
+                if outer_not_token is not None:
+                    node = UnaryOpNode(op_token=outer_not_token, operand=node)
+                if outer_op_token is not None:
+                    node = BinaryOpNode(left=outer_left, op_token=outer_op_token, right=node)
+                left = node
+                pos += 1
+                token = tokens[pos]
+            op_token = token
+            pos += 1
 
-    def parse_atom(self):
+    def parse_atom(self) -> ASTNode:
         """
-        Parses the smallest part of a condition:
-        - ( ... condition ... )
+        Parses the smallest part of a condition (parentheses are handled
+        by parse_condition()):
         - IDENTIFIER > VALUE
         - IDENTIFIER IS NULL
         """
+        # consume() and advance() are inlined here: the position lives in
+        # a local and is written back once the atom is parsed
+        tokens = self.tokens
+        pos = self.pos
+        token = tokens[pos]
         
-        # Case 1: Parenthesized expression ( ... )
-        if self.current_token.type == TokenType.LPAREN:
-            self.advance()
-            node = self.parse_condition()
-            self.consume(TokenType.RPAREN)
-            return node
+        # Identifier-based expression
+        if token.type == TokenType.IDENTIFIER:
+            identifier_node = self.identifier(token)
+            pos += 1
+            token = tokens[pos]
             
-        # Case 2: Identifier-based expression
-        if self.current_token.type == TokenType.IDENTIFIER:
-            identifier_node = IdentifierNode(self.current_token)
-            self.advance()
-            
-            # Sub-case 2a: 'IDENTIFIER IS (NOT)? NULL'
-            if self.current_token.type == TokenType.IS:
-                self.advance()
+            # Case 1: 'IDENTIFIER IS (NOT)? NULL'
+            if token.type == TokenType.IS:
+                pos += 1
+                token = tokens[pos]
                 is_not = False
-                if self.current_token.type == TokenType.NOT:
+                if token.type == TokenType.NOT:
                     is_not = True
-                    self.advance()
-                self.consume(TokenType.NULL)
-                return IsNullNode(identifier=identifier_node, is_not=is_not)
+                    pos += 1
+                    token = tokens[pos]
+                if token.type != TokenType.NULL:
+                    raise unexpected_token(TokenType.NULL, token)
+                self.pos = pos + 1
+                key: tuple = (identifier_node.name, is_not)
+                node = self._node_cache.get(key)
+                if node is None:
+                    node = self._node_cache[key] = IsNullNode(identifier=identifier_node, is_not=is_not)
+                return node
                 
-            # Sub-case 2b: 'IDENTIFIER <op> VALUE'
-            op_types = (TokenType.GT, TokenType.LT, TokenType.GTE, TokenType.LTE, TokenType.EQ, TokenType.NEQ)
-            if self.current_token.type in op_types:
-                op_token = self.current_token
-                self.advance()
+            # Case 2: 'IDENTIFIER <op> VALUE'
+            if (1 << token.type) & COMPARISON_OPERATORS:
+                op_token = token
+                pos += 1
+                token = tokens[pos]
                 
                 # The right side can be a literal value OR another column
-                value_types = (TokenType.NUMBER, TokenType.STRING, TokenType.BOOLEAN, TokenType.IDENTIFIER)
-                if self.current_token.type in value_types:
-                    if self.current_token.type == TokenType.IDENTIFIER:
-                        right_node = IdentifierNode(self.current_token)
-                    else:
-                        right_node = ValueNode(self.current_token)
-                    self.advance()
-                    return ComparisonNode(left_identifier=identifier_node, op_token=op_token, right_value=right_node)
+                if (1 << token.type) & COMPARABLE_VALUES:
+                    self.pos = pos + 1
+                    key = (identifier_node.name, op_token.type, token.type, type(token.value), token.value)
+                    node = self._node_cache.get(key)
+                    if node is None:
+                        right_node: ASTNode
+                        if token.type == TokenType.IDENTIFIER:
+                            right_node = self.identifier(token)
+                        else:
+                            right_node = self.value(token)
+                        node = self._node_cache[key] = ComparisonNode(
+                            left_identifier=identifier_node, op_token=op_token, right_value=right_node)
+                    return node
                 else:
                     raise ParserError(f"Expected Number, String, Boolean, or Identifier after operator",
-                                      self.current_token.line, self.current_token.col)
+                                      token.line, token.col)
 
         # If we get here, the syntax is wrong
-        raise ParserError(f"Unexpected token in expression: {self.current_token.type.name}",
-                          self.current_token.line, self.current_token.col)
+        raise ParserError(f"Unexpected token in expression: {token.type.name}",
+                          token.line, token.col)
+
+
+###############################################################################
+# Parse Cache
+###############################################################################
+
+PARSE_CACHE_SIZE = 128
+# Token stream key -> RuleScriptNode, least recently used first
+_parse_cache: "OrderedDict[tuple, RuleScriptNode]" = OrderedDict()
+
+def parse_tokens(tokens: List[Token]) -> RuleScriptNode:
+    """
+    Parses a token list like Parser(tokens).parse(), reusing the AST of an
+    earlier identical token stream. The key is every token's type and
+    value, plus the value's type so that 1, 1.0 and True differ; line and
+    column are left out, so scripts that only differ in spacing or
+    comments share one AST. Callers get the shared tree and must not
+    modify it (the Executor only adds its caches). Scripts with errors
+    raise every time and are never cached.
+    """
+    key = tuple([(token.type, type(token.value), token.value) for token in tokens])
+    ast = _parse_cache.get(key)
+    if ast is not None:
+        _parse_cache.move_to_end(key)
+        return ast
+    
+    ast = Parser(tokens).parse()
+    
+    _parse_cache[key] = ast
+    if len(_parse_cache) > PARSE_CACHE_SIZE:
+        _parse_cache.popitem(last=False)
+    return ast